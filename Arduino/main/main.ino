@@ -10,6 +10,7 @@
 #define closed_pos 0 // Work out needed positions
 #define open_pos 40
 #define watering_time 2000 // ms
+#define FRAME_SYNC 0xA5     // first byte of every binary sample frame
 
 unsigned long lastWateringTime = 0;
 unsigned long wateringCooldown = 10000; // 10 seconds cooldown in milliseconds
@@ -23,6 +24,10 @@ float temp_warn_max = 999;
 int moist_warn_min = -1;
 int moist_warn_max = 1024;
 
+// Output format (ASCII "moist,temp" lines by default)
+bool binary_mode = false;
+uint8_t frame_seq = 0;
+
 Servo myServo;
 
 void setup()
@@ -80,17 +85,58 @@ void handleSerialInput()
         {
             parseWarningCommand(command);
         }
+        else if (command.startsWith("SET_MODE "))
+        {
+            parseModeCommand(command);
+        }
     }
 }
 
 // === Read and send sensor data ===
 void sendSensorData(int Moisture, float rawTemp)
 {
+    if (binary_mode)
+    {
+        sendSensorFrame(Moisture, rawTemp);
+        return;
+    }
     Serial.print(Moisture);
     Serial.print(",");
     Serial.println(rawTemp, 2);
 }
 
+// === Binary frame: sync, seq, moisture (int16), temp x100 (int16), CRC8 ===
+void sendSensorFrame(int Moisture, float rawTemp)
+{
+    int16_t tempCenti = (int16_t)round(rawTemp * 100.0);
+    uint8_t frame[7];
+
+    frame[0] = FRAME_SYNC;
+    frame[1] = frame_seq++;
+    frame[2] = Moisture & 0xFF; // little-endian
+    frame[3] = (Moisture >> 8) & 0xFF;
+    frame[4] = tempCenti & 0xFF;
+    frame[5] = (tempCenti >> 8) & 0xFF;
+    frame[6] = crc8(&frame[1], 5);
+
+    Serial.write(frame, sizeof(frame));
+}
+
+// === CRC-8, polynomial 0x07, initial value 0x00 ===
+uint8_t crc8(const uint8_t *data, uint8_t len)
+{
+    uint8_t crc = 0x00;
+    for (uint8_t i = 0; i < len; i++)
+    {
+        crc ^= data[i];
+        for (uint8_t bit = 0; bit < 8; bit++)
+        {
+            crc = (crc & 0x80) ? (crc << 1) ^ 0x07 : (crc << 1);
+        }
+    }
+    return crc;
+}
+
 // === Convert TMP36 analog reading to temperature in °C ===
 float tmp_conv(int adcVal)
 {
@@ -165,6 +211,23 @@ void parseWarningCommand(const String &command)
     }
 }
 
+void parseModeCommand(const String &command)
+{
+    String mode = command.substring(9); // Remove "SET_MODE "
+
+    if (mode == "BINARY")
+    {
+        binary_mode = true;
+        frame_seq = 0;
+        Serial.println("Mode: binary");
+    }
+    else if (mode == "ASCII")
+    {
+        binary_mode = false;
+        Serial.println("Mode: ascii");
+    }
+}
+
 void water()
 {
     unsigned long now = millis();
@@ -0,0 +1,166 @@
+import numpy as np
+from perf import PerfMonitor
+from utils import average_batches
+
+# Text the firmware sends besides samples; any other unparsable line counts as malformed
+FIRMWARE_REPLIES = ("ACK_SERVO:", "Open", "Closed", "Received moisture threshold", "Temp warning limits",
+                    "Moisture warning limits", "Mode:")
+
+class Acquisition:
+    # Everything between a sample source and the screen that has to keep running without one:
+    # drains the source, averages complete batches, writes them to the log and history store
+    # and evaluates the warning limits. The GUI runs one in-process; daemon.py runs one headless
+    # and the GUI attaches to it as a client (a DaemonClient source, with no writers of its own).
+    channels = ('moisture', 'temp_C')
+
+    def __init__(self, source, batch_size=10, log_writer=None, history_writer=None):
+        self.source = source
+        self.batch_size = batch_size
+        self.log_writer = log_writer
+        self.history_writer = history_writer
+        self.batch_buffers = {
+            'moisture': np.empty(0),
+            'temp_C': np.empty(0),
+            't': np.empty(0),
+        }
+        self.latest = {channel: None for channel in self.channels}
+        self.bus = None  # optional SampleBus: raw samples are published to it as they arrive
+
+        # Warning limits and the watering threshold, kept in step with the commands sent to the Arduino
+        self.warning_thresholds = {channel: {'min': None, 'max': None} for channel in self.channels}
+        self.threshold_levels = {'moisture': {'min': None}}
+        self.warnings = {channel: {'active': False, 'message': ''} for channel in self.channels}
+        # A daemon already has limits set when a client attaches
+        for name in ('warning_thresholds', 'threshold_levels'):
+            for channel, limits in getattr(source, name, {}).items():
+                getattr(self, name).setdefault(channel, {}).update(limits)
+
+        self.reconnects = getattr(source, 'reconnects', 0)
+
+        self.perf = PerfMonitor()
+        self.source.perf = self.perf
+        if log_writer:
+            log_writer.perf = self.perf
+
+    def poll(self):
+        # (times, moist, temp, messages): the batch averages completed since the last call,
+        # already handed to the writers
+        perf = self.perf
+
+        # Take everything the reader thread has queued since the last call
+        with perf.span('read_samples'):
+            times, moist, temp, messages = self.source.read_timed_samples()
+        perf.count('samples_in', len(moist))
+        if self.bus is not None and len(moist):
+            with perf.span('publish'):
+                self.bus.write(times, moist, temp)
+
+        # Handle servo acknowledgement
+        for line in messages:
+            if line.startswith("ACK_SERVO:"):
+                print(f"[RX] {line}")
+            elif not line.startswith(FIRMWARE_REPLIES):
+                perf.count('malformed')
+
+        # The Arduino reset when its port was reopened, so it has forgotten its limits
+        reconnects = getattr(self.source, 'reconnects', 0)
+        if reconnects != self.reconnects:
+            self.reconnects = reconnects
+            self.restore_limits()
+
+        # Average complete batches, carrying leftover samples into the next call
+        with perf.span('average'):
+            gaps = np.flatnonzero(np.isnan(moist))
+            if len(gaps):
+                avg_time, avg_moist, avg_temp = self.average_across_gaps(times, moist, temp, gaps)
+            else:
+                avg_time, avg_moist, avg_temp = self.average(times, moist, temp)
+
+        if len(avg_moist):
+            # Nothing is known about the sensors during a gap
+            self.latest['moisture'] = None if np.isnan(avg_moist[-1]) else float(avg_moist[-1])
+            self.latest['temp_C'] = None if np.isnan(avg_temp[-1]) else float(avg_temp[-1])
+            if self.log_writer or self.history_writer:
+                with perf.span('log'):
+                    for row in zip(avg_time.tolist(), avg_moist.tolist(), avg_temp.tolist()):
+                        if self.log_writer:
+                            self.log_writer.write(row)
+                        if self.history_writer:
+                            self.history_writer.write(row)
+        return avg_time, avg_moist, avg_temp, messages
+
+    def average(self, times, moist, temp):
+        avg_moist, self.batch_buffers['moisture'] = average_batches(
+            self.batch_buffers['moisture'], moist, self.batch_size)
+        avg_temp, self.batch_buffers['temp_C'] = average_batches(
+            self.batch_buffers['temp_C'], temp, self.batch_size)
+        avg_time, self.batch_buffers['t'] = average_batches(
+            self.batch_buffers['t'], times, self.batch_size)
+        return avg_time, avg_moist, avg_temp
+
+    def average_across_gaps(self, times, moist, temp, gaps):
+        # NaN samples mark a lost connection. Samples from either side of one never share a
+        # batch; the gap itself is passed on as a NaN row, so logs and charts show it.
+        parts = []
+        start = 0
+        for gap in gaps:
+            parts.append(self.average(times[start:gap], moist[start:gap], temp[start:gap]))
+            for channel in self.batch_buffers:
+                self.batch_buffers[channel] = np.empty(0)  # an incomplete batch from before the gap
+            parts.append((times[gap:gap + 1], moist[gap:gap + 1], temp[gap:gap + 1]))
+            start = gap + 1
+        parts.append(self.average(times[start:], moist[start:], temp[start:]))
+        return tuple(np.concatenate(column) for column in zip(*parts))
+
+    def check_warnings(self):
+        # Messages for every channel outside its warning limits, by the latest average
+        active_warnings = []
+        for sensor in self.channels:
+            current_value = self.latest[sensor]
+            min_warn = self.warning_thresholds[sensor]['min']
+            max_warn = self.warning_thresholds[sensor]['max']
+            message = ''
+
+            # If warning values are set and we have current value
+            if min_warn is not None and max_warn is not None and current_value is not None:
+                if current_value < min_warn:
+                    message = f"{sensor.capitalize()} is too low: {current_value:.1f} < {min_warn:.1f}"
+                elif current_value > max_warn:
+                    message = f"{sensor.capitalize()} is too high:\n{current_value:.1f} > {max_warn:.1f}"
+
+            self.warnings[sensor]['active'] = bool(message)
+            self.warnings[sensor]['message'] = message
+            if message:
+                active_warnings.append(message)
+        return active_warnings
+
+    def send_command(self, command):
+        # Forward to the Arduino, noting any limits it sets
+        self.apply_command(command)
+        self.source.send_command(command)
+
+    def restore_limits(self):
+        for channel, limits in self.warning_thresholds.items():
+            if limits['min'] is not None and limits['max'] is not None:
+                self.source.send_command(f"SET_WARN {channel} {limits['min']:.2f} {limits['max']:.2f}")
+        for channel, limits in self.threshold_levels.items():
+            if limits.get('min') is not None:
+                self.source.send_command(f"SET_THRESH {channel} {limits['min']:.0f}")
+
+    def apply_command(self, command):
+        parts = command.split()
+        try:
+            if parts[0] == "SET_WARN" and len(parts) == 4 and parts[1] in self.warning_thresholds:
+                self.warning_thresholds[parts[1]] = {'min': float(parts[2]), 'max': float(parts[3])}
+            elif parts[0] == "SET_THRESH" and len(parts) == 3 and parts[1] in self.threshold_levels:
+                self.threshold_levels[parts[1]]['min'] = float(parts[2])
+        except (IndexError, ValueError):
+            pass  # not a limit command; the Arduino ignores malformed ones too
+
+    def close(self):
+        self.source.close()
+        if self.bus is not None:
+            self.bus.close()
+        for writer in (self.log_writer, self.history_writer):
+            if writer:
+                writer.close()
@@ -0,0 +1,265 @@
+import asyncio
+import time
+from collections import deque
+import numpy as np
+import serial
+from framing import LineFramer, BinaryFramer, decode_frames, count_lost_frames
+from utils import parse_sensor_lines
+
+# Reply that acknowledges each firmware command (by prefix); send_command() waits for it
+COMMAND_REPLIES = {
+    "SET_THRESH": ("Received moisture threshold",),
+    "SET_WARN": ("Temp warning limits", "Moisture warning limits"),
+    "SET_MODE": ("Mode:",),
+    "STEP_SERVO": ("Open",),  # "Closed" follows once watering ends; skipped entirely during the cooldown
+}
+
+class AsyncSerialHandler:
+    # asyncio counterpart of SerialHandler: no reader thread and no fixed 3 s reset delay.
+    # The port is read from the event loop (add_reader where the loop supports it, otherwise
+    # short blocking reads on the default executor), so any number of ports share one loop,
+    # including Qt's through qasync. Open with `await AsyncSerialHandler.open(port)`, then
+    #     async for t, moisture, temp_C in handler: ...
+    #     reply = await handler.send_command("SET_THRESH moisture 40")
+    # It also has SerialHandler's polling interface (read_timed_samples() etc.), so it can drive
+    # a SerialPlotter directly. Use one of the two ways of reading, not both.
+    def __init__(self, port='COM6', baud=9600, max_pending=65536, loop=None):
+        self.port = port
+        self.baud = baud
+        self.loop = loop or asyncio.get_event_loop()
+        self.framer = LineFramer()
+        self.binary = False
+        self.last_seq = None
+        self.lost_frames = 0
+        self.perf = None  # optional PerfMonitor
+
+        # Received samples as (times, moist, temp) chunks; text lines for read_timed_samples()
+        self.chunks = deque()
+        self.offset = 0  # samples already taken from chunks[0] by the iterator
+        self.pending = 0
+        self.max_pending = max_pending
+        self.dropped_lines = 0
+        self.messages = deque(maxlen=1024)
+        self.data_event = asyncio.Event()
+        self.ready = asyncio.Event()  # set by the first valid sample: the Arduino is up
+        self.waiters = []  # (reply prefixes, future) for commands awaiting a reply
+        self.closed = False
+
+        try:
+            self.ser = serial.Serial(port=port, baudrate=baud, timeout=0)
+        except serial.SerialException as e:
+            raise RuntimeError(f"Failed to connect to {port}: {e}")
+
+        # Event-driven reads where the loop can watch the port, otherwise a polling task
+        self.read_task = None
+        try:
+            self.loop.add_reader(self.ser.fileno(), self._on_readable)
+        except (AttributeError, NotImplementedError):
+            self.ser.timeout = 0.1
+            self.read_task = self.loop.create_task(self._poll_reads())
+
+    @classmethod
+    async def open(cls, port, baud=9600, binary=False, ready_timeout=5.0, **kwargs):
+        # Open the port and return once the Arduino has reset and is streaming samples
+        handler = cls(port, baud, loop=asyncio.get_running_loop(), **kwargs)
+        try:
+            await asyncio.wait_for(handler.ready.wait(), ready_timeout)
+        except asyncio.TimeoutError:
+            handler.close()
+            raise RuntimeError(f"No data from {port} within {ready_timeout:g} s")
+        print(f"[INFO] Serial connection established on {port} at {baud} baud.")
+        if binary:
+            await handler.set_binary_mode(True)
+        return handler
+
+    async def set_binary_mode(self, enabled):
+        # As SerialHandler.set_binary_mode(), but returns once the firmware has confirmed the switch
+        self.framer = BinaryFramer() if enabled else LineFramer()
+        self.binary = enabled
+        self.last_seq = None
+        return await self.send_command("SET_MODE BINARY" if enabled else "SET_MODE ASCII")
+
+    # ---- reading (event loop) ----
+
+    def _on_readable(self):
+        try:
+            data = self.ser.read(self.ser.in_waiting or 1)
+        except (serial.SerialException, OSError) as e:
+            print(f"[ERROR] Serial read failed on {self.port}: {e}")
+            self.close()
+            return
+        if data:
+            self._ingest(data)
+
+    async def _poll_reads(self):
+        while not self.closed:
+            try:
+                data = await self.loop.run_in_executor(None, self.ser.read, 4096)
+            except Exception as e:
+                # close() pulls the port out from under a blocking read, which pyserial doesn't
+                # always report as a SerialException
+                if not self.closed:
+                    print(f"[ERROR] Serial read failed on {self.port}: {e}")
+                    self.close()
+                return
+            if data:
+                self._ingest(data)
+
+    def _ingest(self, data):
+        now = time.time()
+        if self.perf:
+            self.perf.count('bytes_in', len(data))
+            with self.perf.span('framing'):
+                moist, temp, lines = self._parse(data)
+        else:
+            moist, temp, lines = self._parse(data)
+
+        if len(moist):
+            self.chunks.append((np.full(len(moist), now), moist, temp))
+            self.pending += len(moist)
+            while self.pending > self.max_pending:
+                # Nobody is reading: keep the newest samples, like SerialHandler's ring buffer
+                times, _, _ = self.chunks.popleft()
+                self.pending -= len(times) - self.offset
+                self.dropped_lines += len(times) - self.offset
+                self.offset = 0
+            self.ready.set()
+            self.data_event.set()
+        for line in lines:
+            self._handle_line(line)
+
+    def _parse(self, data):
+        # (moist, temp, text lines) from one chunk of the stream
+        framer = self.framer
+        if isinstance(framer, BinaryFramer):
+            frames, lines = framer.feed(data)
+        else:
+            frames, lines = b"", framer.feed(data)
+        moist, temp, rejected = parse_sensor_lines(lines)
+        lines = [lines[i] for i in np.flatnonzero(rejected)]
+        if frames:
+            seq, frame_moist, frame_temp = decode_frames(frames)
+            lost, self.last_seq = count_lost_frames(self.last_seq, seq)
+            self.lost_frames += lost
+            moist = np.concatenate((moist, frame_moist))
+            temp = np.concatenate((temp, frame_temp))
+        return moist, temp, lines
+
+    def _handle_line(self, line):
+        # Hand replies to the oldest command waiting for them; every line is also kept as a message
+        self.messages.append(line)
+        for waiter in self.waiters:
+            prefixes, future = waiter
+            if line.startswith(prefixes):
+                self.waiters.remove(waiter)
+                if not future.done():
+                    future.set_result(line)
+                break
+
+    # ---- async API ----
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        # The next (t, moisture, temp_C) sample; ends when the handler is closed
+        while not self.chunks:
+            if self.closed:
+                raise StopAsyncIteration
+            self.data_event.clear()
+            await self.data_event.wait()
+        times, moist, temp = self.chunks[0]
+        i = self.offset
+        self.offset += 1
+        self.pending -= 1
+        if self.offset == len(times):
+            self.chunks.popleft()
+            self.offset = 0
+        return float(times[i]), float(moist[i]), float(temp[i])
+
+    def send_command(self, command, expect=None, timeout=2.0):
+        # Write a command now; the returned future resolves to the firmware's reply line, or to
+        # None if none arrives within `timeout` seconds. `expect` overrides the reply prefixes
+        # from COMMAND_REPLIES; () sends without waiting. Awaiting the result is optional.
+        command = command.strip()
+        if expect is None:
+            expect = COMMAND_REPLIES.get(command.split(' ', 1)[0], ())
+        elif isinstance(expect, str):
+            expect = (expect,)
+        future = self.wait_for_reply(expect, timeout) if expect else None
+        try:
+            self.ser.write((command + "\n").encode('utf-8'))
+            print(f"[TX] {command}")
+        except (serial.SerialException, OSError) as e:
+            print(f"[ERROR] Failed to send '{command}' to {self.port}: {e}")
+            if future is not None:
+                self._expire(future)
+        if future is None:
+            future = self.loop.create_future()
+            future.set_result(None)
+        return future
+
+    def wait_for_reply(self, prefixes, timeout=2.0):
+        # Future for the next text line starting with any of `prefixes` (None after `timeout` s),
+        # e.g. wait_for_reply("Closed", 10) after STEP_SERVO
+        if isinstance(prefixes, str):
+            prefixes = (prefixes,)
+        future = self.loop.create_future()
+        self.waiters.append((tuple(prefixes), future))
+        self.loop.call_later(timeout, self._expire, future)
+        return future
+
+    def _expire(self, future):
+        self.waiters = [waiter for waiter in self.waiters if waiter[1] is not future]
+        if not future.done():
+            future.set_result(None)
+
+    # ---- SerialHandler interface ----
+
+    def start_reader(self):
+        pass  # reading starts when the port is opened
+
+    def stop_reader(self):
+        pass
+
+    def read_timed_samples(self):
+        # Everything received since the last call (non-blocking)
+        chunks, self.chunks = self.chunks, deque()
+        offset, self.offset = self.offset, 0
+        self.pending = 0
+        messages = list(self.messages)
+        self.messages.clear()
+        if not chunks:
+            empty = np.empty(0)
+            return empty, empty, empty, messages
+        times, moist, temp = (np.concatenate([chunk[i] for chunk in chunks])[offset:] for i in range(3))
+        return times, moist, temp, messages
+
+    def read_samples(self):
+        _, moist, temp, messages = self.read_timed_samples()
+        return moist, temp, messages
+
+    @property
+    def in_waiting(self):
+        try:
+            return self.ser.in_waiting if self.ser.is_open else 0
+        except (serial.SerialException, OSError):
+            return 0
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self.read_task is None:
+            try:
+                self.loop.remove_reader(self.ser.fileno())
+            except (OSError, ValueError):
+                pass
+        for _, future in self.waiters:
+            if not future.done():
+                future.set_result(None)
+        self.waiters = []
+        self.data_event.set()  # ends any `async for`
+        if self.ser.is_open:
+            self.ser.close()
+            print(f"[INFO] Closed serial connection on {self.port}")
@@ -0,0 +1,641 @@
+import argparse
+import csv
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tty
+from datetime import datetime
+
+# Headless by default; the benchmarks never show a window
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+from utils import parse_sensor_line, parse_sensor_lines, average_batches, log_sensor_data
+from log_writer import AsyncLogWriter, CsvSink
+
+# Benchmarks for each stage of the hot path: pty read -> parse -> batch averaging -> log -> chart redraw.
+# Every stage runs on the same seeded synthetic dataset and reports throughput plus per-operation
+# latency percentiles. Results go to JSON and can be compared against a saved baseline:
+#
+#   python Python/benchmarks/run_benchmarks.py --save-baseline
+#   python Python/benchmarks/run_benchmarks.py            # fails if a stage regressed
+SEED = 1234
+DEFAULT_SAMPLES = 200_000
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results.json")
+
+def make_dataset(n, seed=SEED):
+    # Fixed synthetic sensor stream: (moisture ints, temperatures, encoded "moist,temp\r\n" lines)
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    moist = np.clip(55 + 20 * np.sin(t / 600) + rng.normal(0, 2, n), 0, 100).astype(np.int64)
+    temp = np.round(21.5 + 1.5 * np.sin(t / 3000) + rng.normal(0, 0.1, n), 2)
+    lines = [f"{m},{c:.2f}" for m, c in zip(moist.tolist(), temp.tolist())]
+    return moist, temp, lines
+
+def summarise(items, total_s, latencies_ns, unit="samples"):
+    latencies_us = np.asarray(latencies_ns, dtype=np.float64) / 1000
+    p50, p90, p99 = np.percentile(latencies_us, [50, 90, 99]) if len(latencies_us) else (0.0, 0.0, 0.0)
+    return {
+        'items': int(items),
+        'unit': unit,
+        'throughput': items / total_s if total_s > 0 else 0.0,
+        'ops': len(latencies_us),
+        'p50_us': float(p50),
+        'p90_us': float(p90),
+        'p99_us': float(p99),
+        'max_us': float(latencies_us.max()) if len(latencies_us) else 0.0,
+    }
+
+def timed(ops):
+    # Run each zero-argument callable once; returns (total seconds, per-call latencies in ns)
+    latencies = []
+    start = time.perf_counter()
+    for op in ops:
+        t0 = time.perf_counter_ns()
+        op()
+        latencies.append(time.perf_counter_ns() - t0)
+    return time.perf_counter() - start, latencies
+
+def chunks(seq, size):
+    return [seq[i:i + size] for i in range(0, len(seq), size)]
+
+# ---- stages ----
+
+def bench_serial_read(dataset, args):
+    # SerialHandler's reader thread draining a pty that a writer floods with the dataset;
+    # latency is one read_samples() call (one GUI tick's worth of work)
+    import serial_handler
+    _, _, lines = dataset
+    payload = ("\r\n".join(lines) + "\r\n").encode()
+
+    master, slave = os.openpty()
+    tty.setraw(slave)
+    handler = serial_handler.SerialHandler(os.ttyname(slave), buffer_size=1 << 16, ready_timeout=0)
+    handler.start_reader()
+
+    writer = threading.Thread(target=_flood, args=(master, payload), daemon=True)
+    received = 0
+    latencies = []
+    start = time.perf_counter()
+    writer.start()
+    deadline = start + 60
+    while received < len(lines) and time.perf_counter() < deadline:
+        t0 = time.perf_counter_ns()
+        moist, _, _ = handler.read_samples()
+        latencies.append(time.perf_counter_ns() - t0)
+        received += len(moist)
+        time.sleep(0.001)
+    total = time.perf_counter() - start
+
+    handler.close()
+    os.close(master)
+    os.close(slave)
+    result = summarise(received, total, latencies)
+    result['lost'] = len(lines) - received
+    return result
+
+def _flood(fd, payload):
+    # Write as fast as the pty accepts it
+    view = memoryview(payload)
+    while view:
+        view = view[os.write(fd, view[:4096]):]
+
+def bench_multi_device(dataset, args, devices=8):
+    # DeviceManager merging `devices` ports, each flooded with its share of the dataset;
+    # latency is one read_device_samples() call across every port
+    from device_manager import DeviceManager
+    _, _, lines = dataset
+    share = len(lines) // devices
+    ptys = [os.openpty() for _ in range(devices)]
+    for _, slave in ptys:
+        tty.setraw(slave)
+    manager = DeviceManager({f"dev{i}": os.ttyname(slave) for i, (_, slave) in enumerate(ptys)},
+                            buffer_size=1 << 16, ready_timeout=0)
+    manager.start_reader()
+
+    writers = []
+    for i, (master, _) in enumerate(ptys):
+        payload = ("\r\n".join(lines[i * share:(i + 1) * share]) + "\r\n").encode()
+        writers.append(threading.Thread(target=_flood, args=(master, payload), daemon=True))
+    expected = share * devices
+    received = 0
+    latencies = []
+    start = time.perf_counter()
+    for writer in writers:
+        writer.start()
+    deadline = start + 60
+    while received < expected and time.perf_counter() < deadline:
+        t0 = time.perf_counter_ns()
+        times, _, _, _, _ = manager.read_device_samples()
+        latencies.append(time.perf_counter_ns() - t0)
+        received += len(times)
+        time.sleep(0.001)
+    total = time.perf_counter() - start
+
+    manager.close()
+    for master, slave in ptys:
+        os.close(master)
+        os.close(slave)
+    result = summarise(received, total, latencies)
+    result['devices'] = devices
+    result['lost'] = expected - received
+    return result
+
+def bench_sample_bus(dataset, args, readers=4):
+    # One SampleBus writer and `readers` readers draining it after every 100-sample write;
+    # latency is one write plus every reader's read
+    from sample_bus import SampleBus, SampleBusReader
+    moist, temp, _ = dataset
+    times = np.arange(len(moist), dtype=np.float64)
+    bus = SampleBus(f"bench_bus_{os.getpid()}", capacity=1 << 16)
+    consumers = [SampleBusReader(bus.name) for _ in range(readers)]
+    received = 0  # across all readers
+
+    def step(i):
+        nonlocal received
+        bus.write(times[i:i + 100], moist[i:i + 100], temp[i:i + 100])
+        for consumer in consumers:
+            received += len(consumer.read())
+
+    total, latencies = timed(lambda i=i: step(i) for i in range(0, len(moist), 100))
+    lost = sum(consumer.lost for consumer in consumers)
+    for consumer in consumers:
+        consumer.close()
+    bus.close()
+    result = summarise(len(moist), total, latencies)
+    result['readers'] = readers
+    result['received'] = received
+    result['lost'] = lost  # records skipped by a lapped reader; received + lost = readers * samples
+    return result
+
+def bench_reconnect(dataset, args, outages=(0.2, 0.5, 1.0, 2.0, 5.0)):
+    # SerialHandler riding out cable pulls: the simulated Arduino is unplugged for each of
+    # `outages` seconds, then plugged back in. Latency is replug -> first sample read again and
+    # throughput is reconnects per second spent reconnecting; detect_ms is unplug -> the handler
+    # noticing. Fails unless every outage is noticed, recovered from and marked by one gap.
+    import serial_handler
+    from simulator import ArduinoSimulator
+    latencies = []
+    detect_ms = []
+    gaps = 0
+    failed = []
+    with tempfile.TemporaryDirectory() as directory:
+        simulator = ArduinoSimulator(rate=200, link=os.path.join(directory, "ttyArduino")).start()
+        handler = serial_handler.SerialHandler(simulator.port)
+        handler.start_reader()
+        for outage in outages:
+            time.sleep(0.2)
+            handler.read_samples()
+            unplugged = time.perf_counter()
+            simulator.unplug()
+            while handler.disconnected_at is None:
+                if time.perf_counter() > unplugged + 10:
+                    failed.append(f"{outage}s outage not detected")
+                    break
+                time.sleep(0.001)
+            detect_ms.append((time.perf_counter() - unplugged) * 1000)
+            time.sleep(max(0.0, unplugged + outage - time.perf_counter()))
+
+            simulator.replug()
+            replugged = time.perf_counter_ns()
+            seen_gap = False
+            deadline = time.perf_counter() + 30
+            while True:
+                moist, _, _ = handler.read_samples()
+                marks = np.flatnonzero(np.isnan(moist))
+                gaps += len(marks)
+                seen_gap = seen_gap or len(marks) > 0
+                if seen_gap and len(moist) and not np.isnan(moist[-1]):
+                    break
+                if time.perf_counter() > deadline:
+                    failed.append(f"no samples within 30s of replugging after a {outage}s outage")
+                    break
+                time.sleep(0.001)
+            latencies.append(time.perf_counter_ns() - replugged)
+        handler.close()
+        simulator.close()
+    if gaps != len(outages):
+        failed.append(f"{gaps} gaps marked for {len(outages)} outages")
+    if handler.reconnects != len(outages):
+        failed.append(f"{handler.reconnects} reconnects for {len(outages)} outages")
+    if failed:
+        raise RuntimeError("reconnect: " + "; ".join(failed))
+
+    result = summarise(len(outages), sum(latencies) / 1e9, latencies, unit="reconnects")
+    result['outages'] = len(outages)
+    result['gaps_marked'] = gaps  # one NaN marker per outage
+    result['reconnects'] = handler.reconnects
+    result['detect_ms'] = float(np.median(detect_ms))
+    return result
+
+def bench_binary_framing(dataset, args, seconds=3.0, faults=0.02):
+    # SerialHandler(binary=True) against the simulated Arduino sending binary frames at 2000/s,
+    # with a `faults` share of them corrupted (bad CRC), preceded by line noise or lost, and a
+    # SET_WARN every 0.1 s so text replies arrive between frames. Latency is one read_samples().
+    # Fails unless every fault was caught: each broken CRC and stray sync byte rejected and
+    # resynchronised past, each missing frame counted in lost_frames, and every reply read intact.
+    import serial_handler
+    from simulator import ArduinoSimulator
+    simulator = ArduinoSimulator(rate=2000, seed=SEED).start()
+    handler = serial_handler.SerialHandler(simulator.port, binary=True)
+    while handler.last_seq is None:
+        handler.read_samples()  # the first frame: the link is in binary mode
+        time.sleep(0.01)
+    simulator.frame_faults = faults
+
+    received = 0
+    out_of_range = 0
+    replies = 0
+    commands = 0
+    latencies = []
+    start = time.perf_counter()
+    next_command = start
+    while time.perf_counter() < start + seconds + 0.5:
+        now = time.perf_counter()
+        if now >= start + seconds:
+            simulator.frame_faults = 0  # clean frames last, so a trailing loss shows up as a gap
+        elif now >= next_command:
+            handler.send_command("SET_WARN temp_C 10.00 30.00")
+            commands += 1
+            next_command += 0.1
+        t0 = time.perf_counter_ns()
+        moist, temp, messages = handler.read_samples()
+        latencies.append(time.perf_counter_ns() - t0)
+        received += len(moist)
+        out_of_range += int(np.count_nonzero((moist < 0) | (moist > 100) | ~((temp > 0) & (temp < 50))))
+        # Bytes of a frame rejected just before a reply end up in front of it as text
+        replies += sum("Temp warning limits updated" in line for line in messages)
+        time.sleep(0.005)
+    total = time.perf_counter() - start
+    simulator.stop()
+    time.sleep(0.1)
+    moist, _, messages = handler.read_samples()
+    received += len(moist)
+    replies += sum("Temp warning limits updated" in line for line in messages)
+    handler.close()
+    simulator.close()
+
+    sent = simulator.faults_sent
+    failed = []
+    if handler.framer.bad_frames < sent['crc'] + sent['garbage']:
+        failed.append(f"{handler.framer.bad_frames} bad frames rejected, {sent['crc'] + sent['garbage']} sent")
+    if handler.lost_frames != sent['crc'] + sent['skip']:
+        failed.append(f"{handler.lost_frames} frames counted lost, {sent['crc'] + sent['skip']} lost")
+    if out_of_range:
+        failed.append(f"{out_of_range} samples decoded from bad frames")
+    if replies != commands:
+        failed.append(f"{replies} replies read, {commands} commands sent")
+    if failed:
+        raise RuntimeError("binary_framing: " + "; ".join(failed))
+
+    result = summarise(received, total, latencies)
+    result['faults'] = dict(sent)
+    result['bad_frames'] = handler.framer.bad_frames
+    result['lost_frames'] = handler.lost_frames
+    result['replies'] = replies
+    return result
+
+def bench_parse_line(dataset, args):
+    # The per-line parser, one call per line
+    _, _, lines = dataset
+    total, latencies = timed(lambda line=line: parse_sensor_line(line) for line in lines)
+    return summarise(len(lines), total, latencies)
+
+def bench_parse_batch(dataset, args):
+    # The vectorised parser on 50-line ticks
+    _, _, lines = dataset
+    ticks = chunks(lines, 50)
+    total, latencies = timed(lambda tick=tick: parse_sensor_lines(tick) for tick in ticks)
+    return summarise(len(lines), total, latencies)
+
+def bench_average(dataset, args):
+    # Batch-of-10 averaging on 50-sample ticks, carrying leftovers like update_data
+    moist, _, _ = dataset
+    ticks = chunks(moist.astype(np.float64), 47)  # not a multiple of 10, so leftovers are exercised
+    pending = [np.empty(0)]
+
+    def step(values):
+        _, pending[0] = average_batches(pending[0], values, 10)
+
+    total, latencies = timed(lambda tick=tick: step(tick) for tick in ticks)
+    return summarise(len(moist), total, latencies)
+
+def bench_log_sensor_data(dataset, args):
+    # The original per-row CSV write + flush
+    moist, temp, _ = dataset
+    n = min(len(moist), 50_000)
+    with tempfile.TemporaryDirectory() as directory, open(os.path.join(directory, "log.csv"), "w", newline="") as f:
+        writer = csv.writer(f)
+        stamp = datetime.now().isoformat(timespec='seconds')
+        rows = list(zip(moist[:n].tolist(), temp[:n].tolist()))
+        total, latencies = timed(lambda row=row: log_sensor_data(writer, stamp, row[0], row[1], f) for row in rows)
+    return summarise(n, total, latencies)
+
+def bench_async_log(dataset, args):
+    # AsyncLogWriter: the GUI-thread cost of write(), and the time to drain everything to disk
+    moist, temp, _ = dataset
+    now = time.time()
+    rows = [(now + i, m, c) for i, (m, c) in enumerate(zip(moist.tolist(), temp.tolist()))]
+    with tempfile.TemporaryDirectory() as directory:
+        log = AsyncLogWriter(CsvSink(os.path.join(directory, "log.csv")))
+        start = time.perf_counter()
+        _, latencies = timed(lambda row=row: log.write(row) for row in rows)
+        log.close(timeout=120)
+        total = time.perf_counter() - start
+    result = summarise(len(rows), total, latencies)
+    result['max_flush_ms'] = log.max_flush_ms
+    return result
+
+def bench_history_write(dataset, args, sessions=3):
+    # HistoryStore taking the dataset at 10 samples/s in batches of 497 rows (one log writer
+    # flush each), closed and reopened `sessions` times as if the daemon were restarted; the odd
+    # batch size puts each restart mid-second. Latency is one write_rows() + flush(). Fails
+    # unless every rollup tier still holds the right count, min and max for every bucket.
+    from history_store import HistoryStore
+    from rollups import ROLLUP_TIERS
+    moist, temp, _ = dataset
+    t = 1_700_000_000.0 + np.arange(len(moist)) * 0.1
+    batches = chunks(list(zip(t.tolist(), moist.astype(np.float64).tolist(), temp.tolist())), 497)
+    total = 0.0
+    latencies = []
+    failed = []
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "history.sqlite")
+        for k in range(sessions):
+            store = HistoryStore(filename)
+
+            def step(batch):
+                store.write_rows(batch)
+                store.flush()
+
+            session = batches[k * len(batches) // sessions:(k + 1) * len(batches) // sessions]
+            seconds, session_latencies = timed(lambda batch=batch: step(batch) for batch in session)
+            store.close()
+            total += seconds
+            latencies += session_latencies
+
+        for tier, width in ROLLUP_TIERS.items():
+            starts, index, counts = np.unique(np.floor(t / width) * width, return_index=True, return_counts=True)
+            for channel, values in (('moisture', moist), ('temp_C', temp)):
+                rollup = store.query_rollups(channel, tier, t[0] - width, t[-1])
+                if not (np.array_equal(rollup['t'], starts) and np.array_equal(rollup['count'], counts)):
+                    failed.append(f"{tier} {channel}: {int(rollup['count'].sum())} samples in "
+                                  f"{len(rollup)} buckets, expected {len(t)} in {len(starts)}")
+                elif not (np.allclose(rollup['min'], np.minimum.reduceat(values, index))
+                          and np.allclose(rollup['max'], np.maximum.reduceat(values, index))):
+                    failed.append(f"{tier} {channel}: wrong min/max")
+        store.close_reader()
+    if failed:
+        raise RuntimeError("history_write: " + "; ".join(failed))
+
+    result = summarise(len(t), total, latencies)
+    result['sessions'] = sessions
+    return result
+
+def _plotter(blit):
+    from PySide6 import QtWidgets
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    import gui
+
+    class IdleSource:
+        # No device: the benchmark feeds the plotter directly
+        def start_reader(self):
+            pass
+
+        def read_timed_samples(self):
+            return np.empty(0), np.empty(0), np.empty(0), []
+
+        def send_command(self, command):
+            pass
+
+        def close(self):
+            pass
+
+    window = gui.SerialPlotter(source=IdleSource(), blit=blit)
+    window.timer.stop()
+    window.clock_timer.stop()
+    window.renderer.stop()
+    window.resize(1200, 800)
+    window.show()
+    app.processEvents()
+    for chart in window.charts.values():
+        chart['chart'].build()  # charts are otherwise built after the first paint
+    return app, window
+
+def _bench_render(dataset, args, blit):
+    # refresh_charts() on a full window: 10 new averaged points per frame, then a redraw
+    moist, temp, _ = dataset
+    with tempfile.TemporaryDirectory() as directory:
+        cwd = os.getcwd()
+        os.chdir(directory)  # the plotter writes its temporary log to the working directory
+        try:
+            app, window = _plotter(blit)
+            start = window.start_epoch
+            fill = min(window.max_points, len(moist))
+            for i in range(fill):
+                window.add_average(float(moist[i]), float(temp[i]), start + i)
+            window.refresh_charts()
+            app.processEvents()
+
+            frames = args.frames
+            def frame(k):
+                base = fill + k * 10
+                for i in range(base, base + 10):
+                    j = i % len(moist)
+                    window.add_average(float(moist[j]), float(temp[j]), start + i)
+                window.refresh_charts()
+
+            total, latencies = timed(lambda k=k: frame(k) for k in range(frames))
+            app.processEvents()
+            window.close()
+        finally:
+            os.chdir(cwd)
+    return summarise(frames, total, latencies, unit="frames")
+
+def bench_render_blit(dataset, args):
+    return _bench_render(dataset, args, blit=True)
+
+def bench_render_full(dataset, args):
+    return _bench_render(dataset, args, blit=False)
+
+# Cold start of the plotter in a fresh interpreter, against a simulated Arduino. Prints the
+# wall-clock time of each milestone as JSON.
+STARTUP_SCRIPT = """
+import json, sys, time
+from PySide6 import QtCore, QtWidgets
+app = QtWidgets.QApplication([])
+import gui
+times = {'imported': time.time()}
+
+class FirstPaint(QtCore.QObject):
+    def eventFilter(self, obj, event):
+        if event.type() == QtCore.QEvent.Type.Paint:
+            times.setdefault('window', time.time())
+        return False
+
+window = gui.SerialPlotter(sys.argv[1])
+first_paint = FirstPaint()
+window.installEventFilter(first_paint)
+window.show()
+deadline = time.time() + 20
+while not ('first_sample' in times and 'charts' in times) and time.time() < deadline:
+    app.processEvents()
+    if 'charts' not in times and all(chart['chart'].chart is not None for chart in window.charts.values()):
+        times['charts'] = time.time()
+    if 'first_sample' not in times and len(window.store):
+        times['first_sample'] = time.time()
+    time.sleep(0.001)
+window.close()
+print(json.dumps(times))
+"""
+
+# The window should be on screen within this long of launching, even on a cold interpreter
+STARTUP_TARGET_MS = 1000
+
+def bench_startup(dataset, args, starts=5):
+    # Launch to first paint of the window (latency per start); also time to the imports, the
+    # charts being built and the first averaged sample, as medians in ms
+    from simulator import ArduinoSimulator
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [sys.path[0], os.environ.get("PYTHONPATH")])))
+    milestones = {'imported': [], 'window': [], 'charts': [], 'first_sample': []}
+    total = 0.0
+    for _ in range(starts):
+        simulator = ArduinoSimulator().start()
+        with tempfile.TemporaryDirectory() as directory:
+            launched = time.time()
+            output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT, simulator.port], cwd=directory, env=env,
+                                    capture_output=True, text=True, timeout=60).stdout
+        simulator.close()
+        times = json.loads(output.strip().splitlines()[-1])
+        for name in milestones:
+            milestones[name].append((times.get(name, float('nan')) - launched) * 1000)
+        total += times['window'] - launched
+    result = summarise(starts, total, [ms * 1e6 for ms in milestones['window']], unit="starts")
+    for name, values in milestones.items():
+        result[f'{name}_ms'] = float(np.median(values))
+    result['target_ms'] = STARTUP_TARGET_MS
+    result['meets_target'] = result['window_ms'] <= STARTUP_TARGET_MS
+    return result
+
+# Stage name -> benchmark(dataset, args)
+BENCHMARKS = {
+    'serial_read': bench_serial_read,
+    'multi_device': bench_multi_device,
+    'multi_device_16': lambda dataset, args: bench_multi_device(dataset, args, devices=16),
+    'sample_bus': bench_sample_bus,
+    'reconnect': bench_reconnect,
+    'binary_framing': bench_binary_framing,
+    'parse_line': bench_parse_line,
+    'parse_batch': bench_parse_batch,
+    'average': bench_average,
+    'log_sensor_data': bench_log_sensor_data,
+    'async_log': bench_async_log,
+    'history_write': bench_history_write,
+    'render_blit': bench_render_blit,
+    'render_full': bench_render_full,
+    'startup': bench_startup,
+}
+
+# ---- baseline comparison ----
+
+def _rate(throughput):
+    # Slow stages (reconnects, startups) keep their decimals instead of rounding to 0/s
+    return f"{throughput:>13.{0 if throughput >= 10 else 2}f}/s "
+
+def _missed_target(result):
+    # Stages with an absolute target (startup) fail on missing it, baseline or not
+    if result.get('meets_target', True):
+        return ""
+    return f"  MISSED TARGET ({result['window_ms']:.0f} ms > {result['target_ms']} ms)"
+
+def compare(results, baseline, tolerance):
+    # A stage regresses if its throughput drops, or its median latency grows, by more than `tolerance`,
+    # or if it misses its own target
+    regressions = []
+    print(f"\n{'stage':<18}{'throughput':>16}{'baseline':>16}{'change':>9}{'p50 µs':>10}{'p99 µs':>10}")
+    for name, result in results['stages'].items():
+        base = baseline.get('stages', {}).get(name)
+        line = f"{name:<18}" + _rate(result['throughput'])
+        missed = _missed_target(result)
+        if base is None:
+            print(line + f"{'-':>16}{'new':>9}{result['p50_us']:>10.1f}{result['p99_us']:>10.1f}" + missed)
+        else:
+            change = result['throughput'] / base['throughput'] - 1 if base['throughput'] else 0.0
+            slower = change < -tolerance or (base['p50_us'] and result['p50_us'] > base['p50_us'] * (1 + tolerance))
+            print(line + _rate(base['throughput']) + f"{change:>+8.0%}{result['p50_us']:>10.1f}{result['p99_us']:>10.1f}"
+                  + ("  REGRESSION" if slower else "") + missed)
+            missed = missed or slower
+        if missed:
+            regressions.append(name)
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ingest, parse, aggregate, log and render stages")
+    parser.add_argument("stages", nargs="*", metavar="STAGE",
+                        help=f"stages to run (default: all): {', '.join(BENCHMARKS)}")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="size of the synthetic dataset")
+    parser.add_argument("--frames", type=int, default=200, help="chart redraws per render stage")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="where to write the results JSON")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before a stage fails")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.stages if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    dataset = make_dataset(args.samples)
+    results = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'seed': SEED,
+            'samples': args.samples,
+        },
+        'stages': {},
+    }
+
+    for name in args.stages or BENCHMARKS:
+        print(f"[INFO] Running {name}...", flush=True)
+        # Keep each stage's own prints (e.g. serial connect messages) out of the report
+        sys.stdout, real_stdout = io.StringIO(), sys.stdout
+        try:
+            results['stages'][name] = BENCHMARKS[name](dataset, args)
+        finally:
+            sys.stdout = real_stdout
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"[INFO] Results written to {args.output}")
+
+    baseline = {}
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"[INFO] Saved baseline to {args.baseline}")
+    elif not os.path.exists(args.baseline):
+        print(f"[WARNING] No baseline at {args.baseline}; run with --save-baseline to create one")
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"[ERROR] Regressed or missed target: {', '.join(regressions)}")
+        return 1
+    print("[INFO] No regressions")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
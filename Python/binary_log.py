@@ -0,0 +1,59 @@
+import gzip
+import os
+import struct
+import numpy as np
+
+# File layout: a 16-byte header followed by packed little-endian fixed-width records,
+# so a whole log can be memory-mapped as one NumPy structured array.
+MAGIC = b"DLOGBIN1"
+HEADER = struct.Struct('<8sII')  # magic, record size, reserved
+RECORD_DTYPE = np.dtype([
+    ('t', '<f8'),  # epoch seconds
+    ('moisture', '<f4'),
+    ('temp_C', '<f4'),
+])
+
+class BinarySink:
+    # Append-only writer for (epoch_time, moisture, temp_C) rows, same interface as CsvSink
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, mode='wb')
+        self.file.write(HEADER.pack(MAGIC, RECORD_DTYPE.itemsize, 0))
+
+    def write_rows(self, rows):
+        self.file.write(np.array(rows, dtype=RECORD_DTYPE).tobytes())
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def read_binary_log(filename):
+    # Memory-map a binary log; returns a read-only structured array with fields
+    # 't', 'moisture' and 'temp_C'. Nothing is parsed or copied up front.
+    # Compressed (.gz) segments can't be mapped, so they are decompressed into memory.
+    if filename.endswith('.gz'):
+        with gzip.open(filename, 'rb') as f:
+            return _parse_binary_log(f.read(), filename)
+
+    with open(filename, 'rb') as f:
+        header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{filename} is too short to be a binary sensor log")
+    magic, record_size, _ = HEADER.unpack(header)
+    if magic != MAGIC or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{filename} is not a binary sensor log")
+
+    # Ignore a partly written record at the end (e.g. after a crash)
+    count = (os.path.getsize(filename) - HEADER.size) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.memmap(filename, dtype=RECORD_DTYPE, mode='r', offset=HEADER.size, shape=(count,))
+
+def _parse_binary_log(data, filename):
+    magic, record_size, _ = HEADER.unpack_from(data) if len(data) >= HEADER.size else (None, None, None)
+    if magic != MAGIC or record_size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{filename} is not a binary sensor log")
+    count = (len(data) - HEADER.size) // RECORD_DTYPE.itemsize
+    return np.frombuffer(data, dtype=RECORD_DTYPE, count=count, offset=HEADER.size)
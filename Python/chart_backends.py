@@ -0,0 +1,281 @@
+import importlib
+import threading
+import numpy as np
+from PySide6 import QtCore, QtWidgets
+from utils import fit_limits, set_hline
+
+# Matplotlib and pyqtgraph take most of the GUI's import time, so each is only
+# imported when the first chart that needs it is built
+pg = None
+
+# Every chart backend exposes the same small interface to SerialPlotter:
+#   widget                  - the QWidget that goes into the chart layout
+#   set_data(x, y)          - replace the plotted series
+#   set_view(xlim, ylim)    - the range the current data needs to be visible
+#   set_hline(name, value)  - 'min_warn', 'max_warn' or 'min_thresh'; None hides the line.
+#                             Returns True if the line moved or changed visibility
+#   render()                - push pending changes to the screen
+#   pixel_width()           - plot width in pixels, used to size the decimation stage
+
+# Warning/threshold line colours, shared by all backends
+HLINE_COLORS = {
+    'min_warn': 'blue',
+    'max_warn': 'red',
+    'min_thresh': 'black',
+}
+
+class MatplotlibChart:
+    def __init__(self, title, ylabel, color, blit=True):
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+
+        self.blit = blit  # redraw only the data line over a cached background
+        self.figure = Figure()
+        self.canvas = FigureCanvas(self.figure)
+        self.widget = self.canvas
+        self.axis = self.figure.add_subplot(111)
+
+        # In blit mode the data line is left out of full redraws and painted on top of the cached background
+        self.line, = self.axis.plot([], [], label=ylabel, color=color, linewidth=2.5, animated=blit)
+        self.hlines = {
+            name: self.axis.axhline(y=0, color=line_color, linestyle='--', linewidth=2, visible=False)
+            for name, line_color in HLINE_COLORS.items()
+        }
+
+        self.axis.set_ylabel(ylabel)
+        self.axis.set_xlabel("Time (s)")
+        self.axis.grid()
+        self.figure.suptitle(title)
+        self.figure.legend(loc="upper right")
+        self.figure.tight_layout()
+
+        self.background = None
+        self.stale = False  # static background needs a full redraw
+        self.xlim = None
+        self.ylim = None
+
+        # Layout is only recomputed when the canvas changes size, not on every frame
+        self.canvas.mpl_connect('resize_event', lambda event: self.figure.tight_layout())
+        if blit:
+            self.canvas.mpl_connect('draw_event', lambda event: self.cache_background())
+
+    def set_data(self, x, y):
+        self.line.set_data(x, y)
+
+    def set_view(self, xlim, ylim):
+        if self.blit:
+            # Limits only move when the data leaves them, so most frames are a cheap blit
+            xlim = fit_limits(self.xlim, xlim[0], xlim[1], 0, (xlim[1] - xlim[0]) * 0.25)
+            ylim = fit_limits(self.ylim, ylim[0], ylim[1], 0)
+        if xlim != self.xlim or ylim != self.ylim:
+            self.xlim = xlim
+            self.ylim = ylim
+            self.axis.set_xlim(*xlim)
+            self.axis.set_ylim(*ylim)
+            self.stale = True
+
+    def set_hline(self, name, value):
+        # Threshold lines are part of the cached background, so only redraw when they move
+        if set_hline(self.hlines[name], value):
+            self.stale = True
+            return True
+        return False
+
+    def render(self):
+        if not self.blit:
+            # Fix cropping by forcing layout adjustment
+            self.figure.tight_layout()
+            self.canvas.draw()
+            return
+
+        if self.stale or self.background is None:
+            self.stale = False
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self.axis.draw_artist(self.line)
+        self.canvas.blit(self.figure.bbox)
+
+    def pixel_width(self):
+        return int(self.axis.bbox.width) or self.canvas.width()
+
+    def cache_background(self):
+        # Called after every full redraw: keep a copy of the static parts, then paint the line on top
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self.axis.draw_artist(self.line)
+
+class PyQtGraphChart:
+    # Raster pyqtgraph plot (no OpenGL). Draws only what is in view and peak-downsamples
+    # long windows, so 100k-point series stay interactive.
+    def __init__(self, title, ylabel, color, **kwargs):
+        global pg
+        if pg is None:
+            try:
+                import pyqtgraph as pg
+            except ImportError:
+                raise RuntimeError("The pyqtgraph chart backend needs the 'pyqtgraph' package.")
+        pg.setConfigOptions(background='w', foreground='k', antialias=False)
+
+        self.widget = pg.PlotWidget(title=title)
+        self.plot = self.widget.getPlotItem()
+        self.plot.setLabel('left', ylabel)
+        self.plot.setLabel('bottom', "Time (s)")
+        self.plot.showGrid(x=True, y=True, alpha=0.3)
+        self.plot.addLegend(offset=(-10, 10))
+        self.plot.setClipToView(True)
+        self.plot.setDownsampling(auto=True, mode='peak')
+        self.plot.setMouseEnabled(x=False, y=False)
+
+        self.curve = self.plot.plot([], [], name=ylabel, pen=pg.mkPen(color, width=2.5))
+        self.hlines = {}
+        for name, line_color in HLINE_COLORS.items():
+            hline = pg.InfiniteLine(angle=0, movable=False,
+                                    pen=pg.mkPen(line_color, width=2, style=pg.QtCore.Qt.PenStyle.DashLine))
+            hline.setVisible(False)
+            self.plot.addItem(hline, ignoreBounds=True)
+            self.hlines[name] = hline
+
+        self.view = None
+
+    def set_data(self, x, y):
+        # NaN gaps break the line instead of being joined across
+        self.curve.setData(np.asarray(x, dtype=float), np.asarray(y, dtype=float), connect='finite')
+
+    def set_view(self, xlim, ylim):
+        if (xlim, ylim) != self.view:
+            self.view = (xlim, ylim)
+            self.plot.setRange(xRange=xlim, yRange=ylim, padding=0)
+
+    def set_hline(self, name, value):
+        hline = self.hlines[name]
+        visible = value is not None
+        if hline.isVisible() == visible and (not visible or hline.value() == value):
+            return False
+        if visible:
+            hline.setValue(value)
+        hline.setVisible(visible)
+        return True
+
+    def pixel_width(self):
+        return int(self.plot.getViewBox().width()) or self.widget.width()
+
+    def render(self):
+        # pyqtgraph repaints itself on the next Qt paint event
+        pass
+
+class LazyChart:
+    # Stands in for a chart backend until its widget is first painted, so the window can open
+    # before the plotting library is even imported. The library is then imported off the GUI
+    # thread and the chart built once it has loaded; hidden charts are never built at all.
+    # Calls made before then are kept and replayed onto the real chart.
+    def __init__(self, factory, on_ready=None, backend=None):
+        self.factory = factory
+        self.backend = backend  # name of the backend, to import its library off the GUI thread
+        self.on_ready = on_ready  # called once the chart exists, to get it painted
+        self.chart = None
+        self.data = None
+        self.view = None
+        self.hlines = {}
+        self.widget = _Placeholder(self.request_build)
+
+    def request_build(self):
+        if self.backend is not None and preload_chart_backend(self.backend).is_alive():
+            QtCore.QTimer.singleShot(20, self.request_build)
+        else:
+            self.build()
+
+    def build(self):
+        if self.chart is not None:
+            return
+        self.chart = self.factory()
+        self.widget.layout().addWidget(self.chart.widget)
+        if self.data is not None:
+            self.chart.set_data(*self.data)
+        if self.view is not None:
+            self.chart.set_view(*self.view)
+        for name, value in self.hlines.items():
+            self.chart.set_hline(name, value)
+        self.data = self.view = None
+        if self.on_ready:
+            self.on_ready()
+
+    def set_data(self, x, y):
+        if self.chart is None:
+            self.data = (x, y)
+        else:
+            self.chart.set_data(x, y)
+
+    def set_view(self, xlim, ylim):
+        if self.chart is None:
+            self.view = (xlim, ylim)
+        else:
+            self.chart.set_view(xlim, ylim)
+
+    def set_hline(self, name, value):
+        if self.chart is not None:
+            self.hlines[name] = value
+            return self.chart.set_hline(name, value)
+        changed = self.hlines.get(name) != value
+        self.hlines[name] = value
+        return changed
+
+    def render(self):
+        if self.chart is not None:
+            self.chart.render()
+
+    def pixel_width(self):
+        return self.chart.pixel_width() if self.chart is not None else self.widget.width()
+
+class _Placeholder(QtWidgets.QWidget):
+    # Empty container that builds its chart once it has first been painted, so the rest of
+    # the window is already on screen while the plotting library loads
+    def __init__(self, build):
+        super().__init__()
+        self.build = build
+        self.painted = False
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.painted:
+            self.painted = True
+            QtCore.QTimer.singleShot(0, self.build)
+
+CHART_BACKENDS = {
+    'matplotlib': MatplotlibChart,
+    'pyqtgraph': PyQtGraphChart,
+}
+
+# Modules each backend imports when its first chart is built
+BACKEND_MODULES = {
+    'matplotlib': ("matplotlib.figure", "matplotlib.backends.backend_qt5agg"),
+    'pyqtgraph': ("pyqtgraph",),
+}
+
+_preloads = {}  # backend name -> the thread importing its modules
+
+def preload_chart_backend(name):
+    # Import a backend's plotting library on a background thread (once), so the GUI thread
+    # and the serial drain it runs aren't stalled for the second that takes
+    thread = _preloads.get(name)
+    if thread is None:
+        def load():
+            for module in BACKEND_MODULES.get(name, ()):
+                try:
+                    importlib.import_module(module)
+                except ImportError:
+                    return  # reported when the chart is built
+        thread = _preloads[name] = threading.Thread(target=load, name=f"preload-{name}", daemon=True)
+        thread.start()
+    return thread
+
+def create_chart_backend(name, title, ylabel, color, blit=True, lazy=False, on_ready=None):
+    # lazy=True returns a LazyChart that builds the backend when its widget is first painted
+    try:
+        backend = CHART_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown chart backend '{name}'. Choose from: {', '.join(CHART_BACKENDS)}")
+    if lazy:
+        return LazyChart(lambda: backend(title, ylabel, color, blit=blit), on_ready, name)
+    return backend(title, ylabel, color, blit=blit)
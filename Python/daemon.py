@@ -0,0 +1,376 @@
+import argparse
+import json
+import os
+import selectors
+import signal
+import socket
+import tempfile
+import threading
+import time
+from collections import deque
+import numpy as np
+from acquisition import Acquisition
+from history_store import HistoryStore
+from log_writer import AsyncLogWriter
+from segmented_log import SegmentedSink
+from sample_bus import SampleBus, DEFAULT_BUS_NAME
+
+# Unix socket where available; "host:port" addresses (and Windows) use TCP on localhost
+DEFAULT_ADDRESS = (os.path.join(tempfile.gettempdir(), "sensor_daemon.sock")
+                   if hasattr(socket, 'AF_UNIX') else "127.0.0.1:50607")
+
+def _parse_address(address):
+    host, sep, port = address.rpartition(':')
+    if sep and port.isdigit():
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    if not hasattr(socket, 'AF_UNIX'):
+        raise ValueError(f"Unix sockets aren't available here; use a host:port address instead of {address}")
+    return socket.AF_UNIX, address
+
+def _encode(message):
+    return (json.dumps(message) + "\n").encode()
+
+class AcquisitionServer:
+    # Runs an Acquisition without a GUI and publishes its batch averages to any number of
+    # clients as newline-delimited JSON. Clients can come and go; logging, the history store
+    # and warning evaluation carry on regardless. A client that falls `max_client_buffer`
+    # bytes behind is disconnected rather than allowed to hold up acquisition.
+    #   server -> client: {"type": "hello", ...session info...}, then {"type": "samples", "t": [...],
+    #                     "moisture": [...], "temp_C": [...], "messages": [...]} per tick
+    #   client -> server: {"type": "command", "command": "SET_WARN temp_C 18.00 30.00"}
+    def __init__(self, acquisition, history_file, address=DEFAULT_ADDRESS, backlog=28800,
+                 max_client_buffer=8 * 1024 * 1024):
+        self.acquisition = acquisition
+        self.history_file = os.path.abspath(history_file)
+        self.address = address
+        self.max_client_buffer = max_client_buffer
+        self.start_time = time.time()
+        self.recent = deque(maxlen=backlog)  # latest averages, sent to clients as they attach
+        self.active_warnings = []  # channels outside their limits
+        self.last_tick_error = None
+        self.stop_event = threading.Event()
+
+        family, sockaddr = _parse_address(address)
+        if family != socket.AF_INET and os.path.exists(sockaddr):
+            os.remove(sockaddr)  # left behind by a daemon that didn't shut down cleanly
+        self.listener = socket.socket(family, socket.SOCK_STREAM)
+        if family == socket.AF_INET:
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind(sockaddr)
+        self.listener.listen()
+        self.listener.setblocking(False)
+
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        self.clients = {}  # socket -> {'in': bytearray, 'out': bytearray}
+
+    def serve_forever(self, interval=0.02, status_interval=60):
+        next_status = time.monotonic() + status_interval
+        while not self.stop_event.is_set():
+            # Serve clients until the next tick is due
+            deadline = time.monotonic() + interval
+            while True:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                for key, events in self.selector.select(timeout):
+                    if key.fileobj is self.listener:
+                        self._accept()
+                    else:
+                        self._service(key.fileobj, events)
+            self.tick()
+
+            if time.monotonic() >= next_status:
+                next_status += status_interval
+                self.print_status()
+
+    def tick(self):
+        try:
+            times, moist, temp, messages = self.acquisition.poll()
+        except Exception as e:
+            # A bad read must not take the daemon (and every client's acquisition) down with it;
+            # report each distinct error once rather than on every tick
+            if str(e) != self.last_tick_error:
+                self.last_tick_error = str(e)
+                print(f"[ERROR] Acquisition poll failed: {e}")
+            return
+        if len(moist) or messages:
+            self.recent.extend(zip(times.tolist(), moist.tolist(), temp.tolist()))
+            self.publish(_encode({'type': 'samples', 't': times.tolist(), 'moisture': moist.tolist(),
+                                  'temp_C': temp.tolist(), 'messages': messages}))
+
+        # Report each channel as it goes out of (or back within) its limits, not every new value
+        self.acquisition.check_warnings()
+        warnings = self.acquisition.warnings
+        active = [sensor for sensor in self.acquisition.channels if warnings[sensor]['active']]
+        if active != self.active_warnings:
+            for sensor in active:
+                if sensor not in self.active_warnings:
+                    print(f"[WARNING] {warnings[sensor]['message'].replace(chr(10), ' ')}")
+            for sensor in self.active_warnings:
+                if sensor not in active:
+                    print(f"[INFO] {sensor} back within its warning limits")
+            self.active_warnings = active
+
+    def publish(self, data):
+        for conn in list(self.clients):
+            self._send(conn, data)
+
+    def print_status(self):
+        perf = self.acquisition.perf
+        rates = perf.update_rates()
+        writer = self.acquisition.log_writer
+        dropped = sum(w.dropped_rows for w in (writer, self.acquisition.history_writer) if w)
+        print(f"[INFO] {rates.get('samples_in', 0):.0f} samples/s, {perf.counters.get('malformed', 0)} malformed, "
+              f"{len(self.clients)} clients, log backlog {writer.queue_depth if writer else 0} rows, "
+              f"{dropped} log rows dropped, {getattr(self.acquisition.source, 'reconnects', 0)} reconnects")
+
+    # ---- clients ----
+
+    def _accept(self):
+        try:
+            conn, _ = self.listener.accept()
+        except OSError:
+            return
+        conn.setblocking(False)
+        self.clients[conn] = {'in': bytearray(), 'out': bytearray()}
+        self.selector.register(conn, selectors.EVENT_READ)
+        acquisition = self.acquisition
+        self._send(conn, _encode({
+            'type': 'hello',
+            'port': acquisition.source.port,
+            'start_time': self.start_time,
+            'history_file': self.history_file,
+            'batch_size': acquisition.batch_size,
+            'warning_thresholds': acquisition.warning_thresholds,
+            'threshold_levels': acquisition.threshold_levels,
+        }))
+        if self.recent:
+            t, moist, temp = (list(column) for column in zip(*self.recent))
+            self._send(conn, _encode({'type': 'samples', 't': t, 'moisture': moist, 'temp_C': temp, 'messages': []}))
+        print(f"[INFO] Client attached ({len(self.clients)} connected)")
+
+    def _service(self, conn, events):
+        client = self.clients.get(conn)
+        if client is None:
+            return
+        if events & selectors.EVENT_WRITE:
+            self._send(conn, b"")
+        if events & selectors.EVENT_READ and conn in self.clients:
+            try:
+                data = conn.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                data = b""
+            if not data:
+                self._drop(conn, "detached")
+                return
+            client['in'] += data
+            while b"\n" in client['in']:
+                line, _, rest = client['in'].partition(b"\n")
+                client['in'] = bytearray(rest)
+                self._handle_request(line)
+
+    def _handle_request(self, line):
+        try:
+            request = json.loads(line)
+        except ValueError:
+            print("[WARNING] Ignoring malformed client request")
+            return
+        if request.get('type') == 'command' and isinstance(request.get('command'), str):
+            command = request['command'].strip()
+            self.acquisition.send_command(command)
+            print(f"[INFO] Sent to Arduino: {command}")
+
+    def _send(self, conn, data):
+        client = self.clients.get(conn)
+        if client is None:
+            return  # dropped earlier in this tick
+        client['out'] += data
+        if len(client['out']) > self.max_client_buffer:
+            self._drop(conn, "dropped: not keeping up")
+            return
+        try:
+            sent = conn.send(client['out'])
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self._drop(conn, "detached")
+            return
+        del client['out'][:sent]
+        # Only watch for writability while something is still queued
+        self.selector.modify(conn, selectors.EVENT_READ | (selectors.EVENT_WRITE if client['out'] else 0))
+
+    def _drop(self, conn, reason):
+        self.selector.unregister(conn)
+        del self.clients[conn]
+        conn.close()
+        print(f"[INFO] Client {reason} ({len(self.clients)} connected)")
+
+    def stop(self):
+        self.stop_event.set()
+
+    def close(self):
+        for conn in list(self.clients):
+            self._drop(conn, "detached")
+        self.selector.close()
+        self.listener.close()
+        family, sockaddr = _parse_address(self.address)
+        if family != socket.AF_INET and os.path.exists(sockaddr):
+            os.remove(sockaddr)
+        self.acquisition.close()
+
+class DaemonClient:
+    # A running daemon as a sample source, with the SerialHandler interface. Samples are the
+    # daemon's batch averages (so use batch_size=1), commands go to the daemon's Arduino, and
+    # close() only detaches: acquisition and logging carry on. history_file is the daemon's
+    # history store, for read-only scroll-back.
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=5):
+        self.address = address
+        family, sockaddr = _parse_address(address)
+        self.sock = socket.socket(family, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(sockaddr)
+            self.file = self.sock.makefile('rb')
+            hello = json.loads(self.file.readline())
+        except (OSError, ValueError) as e:
+            self.sock.close()
+            raise RuntimeError(f"No acquisition daemon at {address}: {e}")
+        self.sock.settimeout(None)
+
+        self.port = hello['port']
+        self.start_time = hello['start_time']
+        self.history_file = hello['history_file']
+        self.batch_size = hello['batch_size']
+        self.warning_thresholds = hello['warning_thresholds']
+        self.threshold_levels = hello['threshold_levels']
+
+        self.pending = deque()
+        self.reader_thread = None
+        self.connected = True
+        self.perf = None  # optional PerfMonitor
+        print(f"[INFO] Attached to acquisition daemon at {address} ({self.port})")
+
+    def start_reader(self):
+        if self.reader_thread is not None:
+            return
+        self.reader_thread = threading.Thread(target=self._reader_loop, name="daemon-client", daemon=True)
+        self.reader_thread.start()
+
+    def _reader_loop(self):
+        try:
+            for line in self.file:
+                message = json.loads(line)
+                if message.get('type') == 'samples':
+                    self.pending.append(message)
+                if self.perf:
+                    self.perf.count('bytes_in', len(line))
+        except (OSError, ValueError):
+            pass
+        if self.connected:
+            self.connected = False
+            print(f"[WARNING] Acquisition daemon at {self.address} closed the connection")
+
+    def read_timed_samples(self):
+        messages = []
+        while self.pending:
+            messages.append(self.pending.popleft())
+        if not messages:
+            empty = np.empty(0)
+            return empty, empty, empty, []
+        columns = (np.concatenate([np.asarray(m[key], dtype=np.float64) for m in messages])
+                   for key in ('t', 'moisture', 'temp_C'))
+        return (*columns, [line for m in messages for line in m['messages']])
+
+    def read_samples(self):
+        _, moist, temp, messages = self.read_timed_samples()
+        return moist, temp, messages
+
+    def send_command(self, command):
+        try:
+            self.sock.sendall(_encode({'type': 'command', 'command': command}))
+        except OSError as e:
+            print(f"[ERROR] Failed to send command to the acquisition daemon: {e}")
+
+    def close(self):
+        # Detach; the daemon keeps acquiring
+        self.connected = False
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        if self.reader_thread is not None:
+            self.reader_thread.join(timeout=2)
+            self.reader_thread = None
+        self.file.close()
+        self.sock.close()
+        print(f"[INFO] Detached from acquisition daemon at {self.address}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Headless acquisition: read the Arduino, average, log and check warnings, "
+                    "and publish samples for the GUI to attach to (main.py --attach)")
+    parser.add_argument("--port", help="serial port of the Arduino")
+    parser.add_argument("--baud", type=int, default=9600)
+    parser.add_argument("--binary", action="store_true",
+                        help="ask the Arduino for binary sample frames instead of ASCII lines")
+    parser.add_argument("--replay", metavar="LOG", help="acquire from a recorded log instead of a serial port")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed as a multiple of real time; 0 replays as fast as possible")
+    parser.add_argument("--batch-size", type=int, default=10, help="samples per logged average")
+    parser.add_argument("--log-format", choices=["csv", "bin"], default="csv",
+                        help="session log format: CSV text or fixed-width binary records")
+    parser.add_argument("--log-dir", default="sensor_logs",
+                        help="directory for the rotating, gzip-compressed log segments and the history store")
+    parser.add_argument("--segment-minutes", type=float, default=60,
+                        help="start a new log segment after this many minutes")
+    parser.add_argument("--segment-mb", type=float, default=64,
+                        help="start a new log segment once the current one reaches this size")
+    parser.add_argument("--listen", default=DEFAULT_ADDRESS,
+                        help=f"Unix socket path or host:port to publish on (default {DEFAULT_ADDRESS})")
+    parser.add_argument("--bus", nargs="?", const=DEFAULT_BUS_NAME, metavar="NAME",
+                        help="also publish every raw sample to a shared-memory sample bus "
+                             f"(default name {DEFAULT_BUS_NAME}) for other processes to read")
+    parser.add_argument("--bus-capacity", type=int, default=1 << 16,
+                        help="samples the bus holds before slow readers start losing the oldest")
+    parser.add_argument("--backlog", type=int, default=28800,
+                        help="recent averages sent to a client when it attaches")
+    args = parser.parse_args(argv)
+
+    if args.replay:
+        from replay import ReplaySource
+        source = ReplaySource(args.replay, speed=args.speed)
+        batch_size = 1  # logged values are already batch averages
+    elif args.port:
+        from serial_handler import SerialHandler
+        source = SerialHandler(args.port, args.baud, binary=args.binary)
+        batch_size = args.batch_size
+    else:
+        parser.error("give --port (or --replay)")
+    source.start_reader()
+
+    log_writer = AsyncLogWriter(SegmentedSink(args.log_dir, args.log_format,
+                                              max_bytes=int(args.segment_mb * 1024 * 1024),
+                                              max_age=args.segment_minutes * 60))
+    history_file = os.path.join(args.log_dir, "history.sqlite")
+    history_writer = AsyncLogWriter(HistoryStore(history_file))
+    acquisition = Acquisition(source, batch_size, log_writer, history_writer)
+    if args.bus:
+        acquisition.bus = SampleBus(args.bus, args.bus_capacity)
+        print(f"[INFO] Publishing raw samples on sample bus '{args.bus}'")
+    server = AcquisitionServer(acquisition, history_file, args.listen, backlog=args.backlog)
+
+    # Shut down cleanly (final log flush, socket removed) on Ctrl+C or a service stop
+    signal.signal(signal.SIGINT, lambda *_: server.stop())
+    signal.signal(signal.SIGTERM, lambda *_: server.stop())
+    print(f"[INFO] Acquiring from {source.port}, logging to {args.log_dir}, publishing on {args.listen}")
+    try:
+        server.serve_forever()
+    finally:
+        server.close()
+        print("[INFO] Acquisition daemon stopped")
+
+if __name__ == "__main__":
+    main()
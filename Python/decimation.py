@@ -0,0 +1,111 @@
+from collections import deque
+import numpy as np
+
+class MinMaxDecimator:
+    # Incremental min/max bucketing for a growing series.
+    # Points go into an open bucket; once it holds `bucket_size` points it is closed and
+    # reduced to its lowest and highest point. When there are more than 2 * target closed
+    # buckets, neighbours are merged pairwise and the bucket size doubles, so the output
+    # stays around `target` buckets (roughly one per pixel column) however long the history.
+    def __init__(self, target=1000):
+        self.target = max(1, int(target))
+        self.reset()
+
+    def reset(self):
+        self.bucket_size = 1
+        # Closed buckets: (first_x, last_x, x_at_min, min, x_at_max, max, count)
+        self.closed = deque()
+        self.open = None
+        self._cache = None
+
+    def set_target(self, target, x=None, y=None):
+        # Change the output resolution; pass the full series to rebuild at the new size
+        target = max(1, int(target))
+        if target == self.target:
+            return
+        self.target = target
+        if x is not None:
+            self.reset()
+            self.extend(x, y)
+
+    def append(self, x, y):
+        if y != y:
+            # NaN marks a gap (e.g. a lost connection): it gets a bucket of its own, which is
+            # never merged away, so the plotted line stays broken there at any zoom
+            if self.open is not None:
+                self.closed.append(tuple(self.open))
+                self.open = None
+            self.closed.append((x, x, x, y, x, y, 0))
+            self._cache = None
+            return
+        bucket = self.open
+        if bucket is None:
+            self.open = [x, x, x, y, x, y, 1]
+            bucket = self.open
+        else:
+            bucket[1] = x
+            if y < bucket[3]:
+                bucket[2], bucket[3] = x, y
+            if y >= bucket[5]:
+                bucket[4], bucket[5] = x, y
+            bucket[6] += 1
+
+        if bucket[6] >= self.bucket_size:
+            self.closed.append(tuple(bucket))
+            self.open = None
+            self._cache = None
+            if len(self.closed) > 2 * self.target:
+                self._merge()
+
+    def extend(self, xs, ys):
+        for x, y in zip(xs, ys):
+            self.append(x, y)
+
+    def _merge(self):
+        merged = deque()
+        closed = self.closed
+        while closed:
+            a = closed.popleft()
+            if not a[6] or not closed or not closed[0][6]:
+                merged.append(a)  # a gap, or the last bucket: nothing to merge with
+                continue
+            b = closed.popleft()
+            lo = a if a[3] <= b[3] else b
+            hi = b if b[5] >= a[5] else a
+            merged.append((a[0], b[1], lo[2], lo[3], hi[4], hi[5], a[6] + b[6]))
+        self.closed = merged
+        self.bucket_size *= 2
+
+    def evict(self, x_start):
+        # Drop buckets that lie entirely before the start of the visible window
+        closed = self.closed
+        while closed and closed[0][1] < x_start:
+            closed.popleft()
+            self._cache = None
+
+    def output(self):
+        # Decimated (x, y) arrays: min and max of every bucket in time order, plus the open bucket
+        if self._cache is None:
+            xs, ys = [], []
+            for bucket in self.closed:
+                self._emit(bucket, xs, ys)
+            self._cache = (xs, ys)
+
+        xs, ys = self._cache
+        if self.open is not None:
+            xs, ys = list(xs), list(ys)
+            self._emit(self.open, xs, ys)
+        return np.array(xs, dtype=float), np.array(ys, dtype=float)
+
+    @staticmethod
+    def _emit(bucket, xs, ys):
+        _, _, x_min, y_min, x_max, y_max, _ = bucket
+        if x_min == x_max:
+            xs.append(x_min)
+            ys.append(y_min)
+        elif x_min < x_max:
+            xs.extend((x_min, x_max))
+            ys.extend((y_min, y_max))
+        else:
+            xs.extend((x_max, x_min))
+            ys.extend((y_max, y_min))
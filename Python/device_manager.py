@@ -0,0 +1,215 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from serial_handler import SerialHandler
+
+def parse_port_list(text):
+    # "COM3,COM4" or "bed1=COM3,bed2=/dev/ttyACM0" -> {device_id: port}
+    devices = {}
+    for item in text.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        device_id, _, port = item.rpartition('=')
+        port = port.strip()
+        device_id = device_id.strip() or os.path.basename(port)
+        if device_id in devices:
+            raise ValueError(f"Device '{device_id}' is listed twice")
+        devices[device_id] = port
+    if not devices:
+        raise ValueError("No serial ports given")
+    return devices
+
+class DeviceManager:
+    # Several Arduinos read concurrently, one SerialHandler (and reader thread) per port.
+    # read_device_samples() drains every port at once and returns a single time-ordered stream
+    # tagged with the device index; source(device_id) gives a per-device view of that stream
+    # with the SerialHandler interface, so each device can drive its own SerialPlotter.
+    def __init__(self, devices, baud=9600, binary=False, buffer_size=4096, handlers=None, ready_timeout=5.0,
+                 background=False):
+        # devices: {device_id: port}; handlers: already open handlers for them, in the same order.
+        # background=True returns at once and lets every port connect on its own thread.
+        self.device_ids = list(devices)
+
+        if handlers is None and background:
+            handlers = [SerialHandler(port, baud, buffer_size=buffer_size, binary=binary, ready_timeout=ready_timeout,
+                                      background=True) for port in devices.values()]
+        elif handlers is None:
+            # Each port waits for its Arduino to reset, so open them all at once
+            with ThreadPoolExecutor(max_workers=min(32, len(devices))) as pool:
+                handlers = list(pool.map(lambda port: SerialHandler(port, baud, buffer_size=buffer_size, binary=binary,
+                                                                    ready_timeout=ready_timeout), devices.values()))
+        self.handlers = dict(zip(self.device_ids, handlers))
+
+        self.last_poll = {device_id: time.time() for device_id in self.device_ids}
+        self.pending = {device_id: [] for device_id in self.device_ids}  # per-device views
+        self.sources = {}
+        self._perf = None
+
+    @property
+    def perf(self):
+        return self._perf
+
+    @perf.setter
+    def perf(self, perf):
+        # Share one PerfMonitor across all reader threads
+        self._perf = perf
+        for handler in self.handlers.values():
+            handler.perf = perf
+
+    def start_reader(self):
+        for handler in self.handlers.values():
+            handler.start_reader()
+
+    def stop_reader(self):
+        for handler in self.handlers.values():
+            handler.stop_reader()
+
+    def read_device_samples(self):
+        # (times, device_index, moist, temp, messages) for everything received on any port since
+        # the last call, sorted by time. Samples from one read are spread evenly between that
+        # device's previous read and now. messages are (device_id, line) pairs.
+        now = time.time()
+        parts = []
+        messages = []
+        for index, (device_id, handler) in enumerate(self.handlers.items()):
+            moist, temp, lines = handler.read_samples()
+            messages.extend((device_id, line) for line in lines)
+            if len(moist):
+                times = np.linspace(self.last_poll[device_id], now, len(moist) + 1)[1:]
+                parts.append((times, np.full(len(moist), index), moist, temp))
+                self.last_poll[device_id] = now
+
+        if not parts:
+            empty = np.empty(0)
+            return empty, np.empty(0, dtype=np.int64), empty, empty, messages
+        times, device, moist, temp = (np.concatenate(column) for column in zip(*parts))
+        order = np.argsort(times, kind='stable')
+        return times[order], device[order], moist[order], temp[order], messages
+
+    def read_timed_samples(self):
+        # All devices as one untagged stream
+        times, _, moist, temp, messages = self.read_device_samples()
+        return times, moist, temp, [line for _, line in messages]
+
+    def read_samples(self):
+        _, moist, temp, messages = self.read_timed_samples()
+        return moist, temp, messages
+
+    def poll(self):
+        # Drain every port and hand each device its slice of the merged stream
+        times, device, moist, temp, messages = self.read_device_samples()
+        for index, device_id in enumerate(self.device_ids):
+            mask = device == index
+            lines = [line for source, line in messages if source == device_id]
+            if mask.any() or lines:
+                self.pending[device_id].append((times[mask], moist[mask], temp[mask], lines))
+
+    def take(self, device_id):
+        # Everything polled for one device since it last asked
+        chunks, self.pending[device_id] = self.pending[device_id], []
+        if not chunks:
+            empty = np.empty(0)
+            return empty, empty, empty, []
+        times, moist, temp = (np.concatenate([chunk[i] for chunk in chunks]) for i in range(3))
+        return times, moist, temp, [line for chunk in chunks for line in chunk[3]]
+
+    def source(self, device_id):
+        if device_id not in self.sources:
+            self.sources[device_id] = DeviceSource(self, device_id)
+        return self.sources[device_id]
+
+    def send_command(self, command, device_id=None):
+        # To one device, or to all of them
+        targets = [device_id] if device_id is not None else self.device_ids
+        for target in targets:
+            self.handlers[target].send_command(command)
+
+    @property
+    def dropped_lines(self):
+        return sum(handler.dropped_lines for handler in self.handlers.values())
+
+    @property
+    def lost_frames(self):
+        return sum(handler.lost_frames for handler in self.handlers.values())
+
+    @property
+    def in_waiting(self):
+        return sum(handler.in_waiting for handler in self.handlers.values())
+
+    def close(self):
+        for handler in self.handlers.values():
+            handler.close()
+
+class DeviceSource:
+    # One device's share of a DeviceManager, with the SerialHandler interface. Whichever
+    # source is read first in a tick polls all ports; the others pick up what is already queued.
+    def __init__(self, manager, device_id):
+        self.manager = manager
+        self.device_id = device_id
+        self.handler = manager.handlers[device_id]
+        self.closed = False
+
+    def start_reader(self):
+        self.handler.start_reader()
+
+    def read_timed_samples(self):
+        if not self.manager.pending[self.device_id]:
+            self.manager.poll()
+        return self.manager.take(self.device_id)
+
+    def read_samples(self):
+        _, moist, temp, messages = self.read_timed_samples()
+        return moist, temp, messages
+
+    def send_command(self, command):
+        self.manager.send_command(command, self.device_id)
+
+    @property
+    def port(self):
+        return self.handler.port
+
+    @property
+    def framer(self):
+        return self.handler.framer
+
+    @property
+    def connecting(self):
+        return getattr(self.handler, 'connecting', False)
+
+    @property
+    def error(self):
+        return getattr(self.handler, 'error', None)
+
+    @property
+    def disconnected_at(self):
+        return getattr(self.handler, 'disconnected_at', None)
+
+    @property
+    def reconnects(self):
+        return getattr(self.handler, 'reconnects', 0)
+
+    @property
+    def dropped_lines(self):
+        return self.handler.dropped_lines
+
+    @property
+    def lost_frames(self):
+        return self.handler.lost_frames
+
+    @property
+    def in_waiting(self):
+        return self.handler.in_waiting
+
+    @property
+    def perf(self):
+        return self.handler.perf
+
+    @perf.setter
+    def perf(self, perf):
+        self.handler.perf = perf
+
+    def close(self):
+        self.closed = True
+        self.handler.close()
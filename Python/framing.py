@@ -0,0 +1,144 @@
+import struct
+import numpy as np
+
+class LineFramer:
+    # Incremental splitter for a newline-terminated byte stream.
+    # Bytes after the last b"\n" are kept and completed by the next call to feed().
+    def __init__(self, max_line=1024):
+        self.buffer = bytearray()
+        self.max_line = max_line
+        self.discarded = 0  # bytes thrown away from over-long partial lines
+
+    def feed(self, data):
+        buf = self.buffer
+        buf += data
+
+        end = buf.rfind(b"\n")
+        if end < 0:
+            # No complete line yet; don't let a stream with no newlines grow forever
+            if len(buf) > self.max_line:
+                self.discarded += len(buf)
+                buf.clear()
+            return []
+
+        # Decode every complete line with one call straight from the buffer,
+        # then drop the consumed prefix (deleting from the front of a bytearray is O(1))
+        with memoryview(buf) as view:
+            text = str(view[:end], 'utf-8', 'replace')
+        del buf[:end + 1]
+
+        return [line for line in (part.strip() for part in text.split("\n")) if line]
+
+    def reset(self):
+        self.buffer.clear()
+
+
+# === Binary framing ===
+# 7-byte frame: sync, sequence number, moisture (int16), temperature in 0.01 °C (int16), CRC8.
+# Multi-byte fields are little-endian, matching the ATmega328P.
+SYNC_BYTE = 0xA5
+FRAME_STRUCT = struct.Struct('<BBhhB')
+FRAME_SIZE = FRAME_STRUCT.size
+FRAME_DTYPE = np.dtype([
+    ('sync', 'u1'),
+    ('seq', 'u1'),
+    ('moisture', '<i2'),
+    ('temp', '<i2'),
+    ('crc', 'u1'),
+])
+TEMP_SCALE = 100.0
+MAX_RUN = 512  # frames validated per vectorised check
+
+def _make_crc8_table(poly=0x07):
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) & 0xFF if crc & 0x80 else (crc << 1) & 0xFF
+        table.append(crc)
+    return table
+
+CRC8_TABLE = _make_crc8_table()
+_CRC8_ARRAY = np.array(CRC8_TABLE, dtype=np.uint8)
+
+def crc8(data):
+    # CRC-8 (poly 0x07, init 0x00) as computed by crc8() in main.ino
+    crc = 0
+    for byte in data:
+        crc = CRC8_TABLE[crc ^ byte]
+    return crc
+
+def encode_frame(seq, moist, temp):
+    body = FRAME_STRUCT.pack(SYNC_BYTE, seq & 0xFF, int(moist), int(round(temp * TEMP_SCALE)), 0)
+    return body[:-1] + bytes([crc8(body[1:-1])])
+
+def decode_frames(data):
+    # Decode a buffer of validated frames into (seq, moisture, temp) arrays without copying it
+    frames = np.frombuffer(data, dtype=FRAME_DTYPE)
+    return frames['seq'], frames['moisture'].astype(np.int64), frames['temp'] / TEMP_SCALE
+
+def count_lost_frames(last_seq, seq):
+    # Frames lost in transit, from gaps in the 8-bit sequence numbers `seq` that follow
+    # `last_seq` (None at the start of a stream); returns (lost, new last_seq)
+    if not len(seq):
+        return 0, last_seq
+    seq = seq.astype(np.int64)
+    if last_seq is not None:
+        seq = np.concatenate(([last_seq], seq))
+    return int(((np.diff(seq) - 1) % 256).sum()), int(seq[-1])
+
+def _valid_run(buf, start, count):
+    # Length of the run of consecutive valid frames starting at `start` (checked in one pass)
+    raw = np.frombuffer(buf, dtype=np.uint8, count=count * FRAME_SIZE, offset=start).reshape(count, FRAME_SIZE)
+    crc = np.zeros(count, dtype=np.uint8)
+    for col in range(1, FRAME_SIZE - 1):
+        crc = _CRC8_ARRAY[crc ^ raw[:, col]]
+    valid = (raw[:, 0] == SYNC_BYTE) & (crc == raw[:, -1])
+    return count if valid.all() else int(np.argmin(valid))
+
+class BinaryFramer:
+    # Splits a mixed stream into binary sample frames and ASCII text lines.
+    # The firmware still prints status messages ("Open", "Closed", ...) as text in binary mode,
+    # and 0xA5 can never appear in ASCII, so anything outside a valid frame is treated as text.
+    def __init__(self, max_line=1024):
+        self.buffer = bytearray()
+        self.text = LineFramer(max_line)
+        self.bad_frames = 0
+
+    def feed(self, data):
+        # Returns (frames, lines): concatenated valid frames as bytes, and complete text lines
+        buf = self.buffer
+        buf += data
+        frames = bytearray()
+        text = bytearray()
+
+        i = 0
+        n = len(buf)
+        while i < n:
+            j = buf.find(SYNC_BYTE, i)
+            if j < 0:
+                text += buf[i:]
+                i = n
+                break
+            if j > i:
+                text += buf[i:j]
+            if n - j < FRAME_SIZE:
+                i = j  # wait for the rest of this frame
+                break
+
+            run = _valid_run(buf, j, min((n - j) // FRAME_SIZE, MAX_RUN))
+            if run:
+                frames += buf[j:j + run * FRAME_SIZE]
+                i = j + run * FRAME_SIZE
+            else:
+                # Sync byte without a valid frame behind it: resynchronise on the next byte
+                self.bad_frames += 1
+                i = j + 1
+
+        del buf[:i]
+        lines = self.text.feed(text) if text else []
+        return bytes(frames), lines
+
+    def reset(self):
+        self.buffer.clear()
+        self.text.reset()
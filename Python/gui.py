@@ -1,27 +1,39 @@
 import os
-import csv
+import time
 from datetime import datetime
-from collections import deque, defaultdict
-from PySide6 import QtWidgets, QtCore, QtMultimedia
+from collections import defaultdict
+from PySide6 import QtWidgets, QtCore, QtGui
 from PySide6.QtWidgets import (QHBoxLayout, QLabel, QLineEdit, QPushButton, QGroupBox, 
-                            QVBoxLayout, QCheckBox, QScrollArea, QWidget, QComboBox)
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+                            QVBoxLayout, QCheckBox, QScrollArea, QWidget, QComboBox, QSlider)
+from chart_backends import create_chart_backend
+from decimation import MinMaxDecimator
+from timeseries_store import TimeSeriesStore
+from stats import ChannelStats, STATS_WINDOWS
 from serial_handler import SerialHandler
+from log_writer import AsyncLogWriter, LOG_FORMATS, create_log_sink
+from segmented_log import SegmentedSink
+from history_store import HistoryStore
+from acquisition import Acquisition
 from utils import (
-    parse_sensor_line,
-    get_iso_timestamp,
     get_current_time_string,
     validate_range,
     generate_filename,
-    log_sensor_data,
+    set_label_text,
     validate_range,
     generate_filename,
-    log_sensor_data,
     update_labels
 )
 from themes import apply_theme
 
+# Scroll-back window lengths in seconds (None = the whole session)
+HISTORY_SPANS = {
+    '10 min': 600,
+    '1 h': 3600,
+    '6 h': 6 * 3600,
+    '24 h': 24 * 3600,
+    'Session': None,
+}
+
 class CollapsibleGroupBox(QGroupBox):
     def __init__(self, title="", parent=None):
         super().__init__(title, parent)
@@ -43,77 +55,163 @@ class CollapsibleGroupBox(QGroupBox):
         self.content_container.setLayout(layout)
         layout.setContentsMargins(5, 5, 5, 5)
 
+class RenderScheduler(QtCore.QObject):
+    # Decouples repainting from the data rate: the data path marks parts of the UI dirty,
+    # and a separate timer repaints each dirty part at most once per frame.
+    def __init__(self, max_fps=30, parent=None):
+        super().__init__(parent)
+        self.painters = {}
+        self.dirty = set()
+        self.frames = 0
+        self.perf = None  # optional PerfMonitor: times each painter
+
+        self.timer = QtCore.QTimer(self)
+        self.timer.timeout.connect(self.flush)
+        self.set_max_fps(max_fps)
+
+    def register(self, key, painter):
+        # Painters run in registration order
+        self.painters[key] = painter
+
+    def mark_dirty(self, *keys):
+        self.dirty.update(keys)
+
+    def set_max_fps(self, max_fps):
+        self.max_fps = max_fps
+        self.timer.start(max(1, int(1000 / max_fps)))
+
+    def flush(self):
+        if not self.dirty:
+            return
+        # Nothing to paint while hidden (e.g. a background device tab); keep it dirty until shown
+        parent = self.parent()
+        if parent is not None and not parent.isVisible():
+            return
+        # Swap first so anything marked while painting lands in the next frame
+        dirty, self.dirty = self.dirty, set()
+        for key, painter in self.painters.items():
+            if key in dirty:
+                if self.perf:
+                    with self.perf.span(f"paint_{key}"):
+                        painter()
+                else:
+                    painter()
+        self.frames += 1
+        if self.perf:
+            self.perf.count('frames')
+
+    def stop(self):
+        self.timer.stop()
+
 class SerialPlotter(QtWidgets.QWidget):
-    def __init__(self, port='COM6', baud=9600, max_points=20, parent=None):
+    def __init__(self, port='COM6', baud=9600, max_points=28800, binary=False, blit=True, max_fps=30,
+                 chart_backend='matplotlib', log_format='csv', log_dir=None, segment_max_age=3600,
+                 segment_max_bytes=64 * 1024 * 1024, source=None, batch_size=10, device_id=None,
+                 start_time=None, parent=None):
         super().__init__(parent)
-        self.setWindowTitle("Real-Time Sensor Plotter")
+        self.setWindowTitle(f"Real-Time Sensor Plotter - {device_id}" if device_id else "Real-Time Sensor Plotter")
+        self.device_id = device_id
         self.resize(1200, 800)  # increase size of window for more charts
 
         # Set default theme
         self.theme = "light"
 
-        # Set up serial communication
-        self.serial = SerialHandler(port, baud)
+        # Set up serial communication, unless another sample source (e.g. a log replay) is given.
+        # The port opens in the background, so the window shows while the Arduino resets.
+        self.serial = source or SerialHandler(port, baud, binary=binary, background=True)
+        self.connect_error_shown = False
+        self.last_update_error = None
+        self.serial.start_reader()
         self.max_points = max_points
         self.sample_count = 0
-        self.batch_size = 10
 
-        # instead of signal variable per data stream now we use dictionary to manage different data stream from different sensor
-        self.data_buffers = {
-            'moisture': deque(maxlen=max_points),
-            'temp_C': deque(maxlen=max_points),
-        }
-        self.batch_buffers = {
-            'moisture': [],
-            'temp_C': [],
-        }
-        self.timestamps = deque(maxlen=max_points)
+        # Attached to an acquisition daemon: it averages, logs and keeps the history; we only display
+        self.attached = getattr(self.serial, 'history_file', None) is not None
+        self.batch_size = 1 if self.attached else batch_size
+
+        # One preallocated circular array per sensor channel, sharing a timestamp column
+        self.store = TimeSeriesStore(['moisture', 'temp_C'], max_points)
+
+        # Reduce each (long) history to about one min/max pair per pixel column before plotting
+        self.decimators = {sensor: MinMaxDecimator() for sensor in self.store.channels}
 
         # Chart management
+        self.chart_backend = chart_backend
+        self.blit = blit  # Matplotlib only: redraw just the data line over a cached background
         self.charts = {}
         self.active_charts = ['moisture', 'temp_C']  # default chart
 
-        # Time tracking
-        self.start_time = datetime.now()
-
-        # CSV logging setup
-        self.filename = generate_filename()
-        self.csv_file = open(self.filename, mode='w', newline='')
-        self.csv_writer = csv.writer(self.csv_file)
-        self.csv_writer.writerow(["timestamp", "moisture", "temp_C"])
-
-        # Warning system
-        self.warnings = {
-            'moisture': {'active': False, 'message': ''},
-            'temp_C': {'active': False, 'message': ''}
-        }
-        
-        # Warning  storage
-        self.warning_thresholds = {
-            'moisture': {'min': None, 'max': None},
-            'temp_C': {'min': None, 'max': None}
-        }
-        # Threshold levels
-        self.threshold_levels = {
-            'moisture': {'min': None},
-        }
-
-        # Sound for warnings
-        self.warning_sound = QtMultimedia.QSoundEffect()
-        self.warning_sound.setSource(QtCore.QUrl.fromLocalFile("Python/Warning_Sound.wav"))
-        self.warning_sound.setVolume(0.5)
+        # Time tracking (a replay runs on the recorded clock; several devices share one time base)
+        replay_start = getattr(self.serial, 'start_time', None)
+        if start_time is None:
+            start_time = datetime.fromtimestamp(replay_start) if replay_start else datetime.now()
+        self.start_time = start_time
+        self.start_epoch = self.start_time.timestamp()
+
+        # Logging setup (CSV or binary records): rows are written and flushed in batches on a background thread
+        # With a log directory the session is kept as rotating, compressed segments;
+        # otherwise it goes to a single temporary file that is deleted on close
+        # With several devices each one gets its own log (a subdirectory of log_dir, or a file prefix)
+        log_prefix = f"sensor_log_{device_id}" if device_id else "sensor_log"
+        if log_dir and device_id:
+            log_dir = os.path.join(log_dir, device_id)
+        if self.attached:
+            self.filename = None
+            self.log_writer = None
+        elif log_dir:
+            self.filename = None
+            self.log_writer = AsyncLogWriter(
+                SegmentedSink(log_dir, log_format, max_bytes=segment_max_bytes, max_age=segment_max_age))
+        else:
+            self.filename = generate_filename(log_prefix, LOG_FORMATS[log_format][1])
+            self.log_writer = AsyncLogWriter(create_log_sink(log_format, self.filename))
+
+        # Whole-session history for scroll-back, written alongside the log
+        if self.attached:
+            self.history_file = self.serial.history_file
+        elif log_dir:
+            self.history_file = os.path.join(log_dir, "history.sqlite")
+        else:
+            self.history_file = generate_filename(log_prefix, "sqlite")
+        self.history = HistoryStore(self.history_file)
+        self.history_writer = None if self.attached else AsyncLogWriter(self.history)
+
+        # Draining, batching, logging and warning evaluation
+        self.acquisition = Acquisition(self.serial, self.batch_size, self.log_writer, self.history_writer)
+        self.live = True  # False while the charts show a window from the history store
+        self.history_span = '1 h'
+
+        # Warning system: state, warning limits and threshold levels are the acquisition's
+        self.warnings = self.acquisition.warnings
+        self.warning_thresholds = self.acquisition.warning_thresholds
+        self.threshold_levels = self.acquisition.threshold_levels
+
+        # Sound for warnings, loaded with the first warning (QtMultimedia is slow to import)
+        self.warning_sound = None
         self.warning_playing = False
 
-        # Tracking variables (must be in __init__)
-        self.min_readings = {'moisture': float('inf'), 'temp_C': float('inf')}
-        self.max_readings = {'moisture': float('-inf'), 'temp_C': float('-inf')}
-
+        # Streaming statistics: whole session, rolling windows and the visible chart window
+        self.stats = {sensor: ChannelStats(max_points) for sensor in self.store.channels}
+        self.stats_window = 'Session'
 
         # Min/max labels
         self.moisture_min_label = QLabel("Min Moisture: ---")
         self.moisture_max_label = QLabel("Max Moisture: ---")
+        self.moisture_mean_label = QLabel("Mean Moisture: ---")
         self.temp_min_label = QLabel("Min Temp: ---")
         self.temp_max_label = QLabel("Max Temp: ---")
+        self.temp_mean_label = QLabel("Mean Temp: ---")
+
+        # Repaint charts, labels and the warning panel from their own timer
+        self.renderer = RenderScheduler(max_fps, self)
+        self.renderer.register('charts', self.refresh_charts)
+        self.renderer.register('labels', self.refresh_labels)
+        self.renderer.register('warnings', self.refresh_warning_display)
+        self.active_warnings = []
+
+        # Hot-path timing: every stage of update_data, the painters, framing and log flushes
+        self.perf = self.acquisition.perf
+        self.renderer.perf = self.perf
 
         self.setup_ui()
         self.setup_timer()
@@ -156,7 +254,7 @@ class SerialPlotter(QtWidgets.QWidget):
         
         # chart toggle control
         self.chart_checkboxes = {}
-        for sensor in self.data_buffers.keys():
+        for sensor in self.store.channels:
             cb = QCheckBox(f"Show {sensor} chart")
             cb.setChecked(sensor in self.active_charts)
             cb.stateChanged.connect(self.toggle_chart_visibility)
@@ -208,7 +306,7 @@ class SerialPlotter(QtWidgets.QWidget):
         
         # Warning controls for each sensor
         self.warning_controls = {}
-        for sensor in self.data_buffers.keys():  # Include both moisture and temp_C in chart toggle
+        for sensor in self.store.channels:  # Include both moisture and temp_C in chart toggle
             sensor_group = QGroupBox(f"{sensor.capitalize()} Warnings")
             sensor_layout = QVBoxLayout()
             
@@ -261,16 +359,70 @@ class SerialPlotter(QtWidgets.QWidget):
         readout_layout = QVBoxLayout()
         self.moisture_label = QLabel("Moisture: ---")
         self.temp_label = QLabel("Temperature: ---")
+
+        # Which window the min/max/mean labels summarise
+        self.stats_window_combo = QComboBox()
+        self.stats_window_combo.addItems(['Session'] + list(STATS_WINDOWS))
+        self.stats_window_combo.currentTextChanged.connect(self.set_stats_window)
+        readout_layout.addWidget(QLabel("Statistics over:"))
+        readout_layout.addWidget(self.stats_window_combo)
+        readout_layout.addSpacing(5)
+
         readout_layout.addWidget(self.moisture_label)
         readout_layout.addWidget(self.moisture_min_label)
         readout_layout.addWidget(self.moisture_max_label)
+        readout_layout.addWidget(self.moisture_mean_label)
         readout_layout.addSpacing(5)
         readout_layout.addWidget(self.temp_label)
         readout_layout.addWidget(self.temp_min_label)
         readout_layout.addWidget(self.temp_max_label)
+        readout_layout.addWidget(self.temp_mean_label)
 
         readout_group.setLayout(readout_layout)
 
+        # ================== LOGGING STATUS ==================
+        logging_group = QGroupBox("Logging")
+        logging_layout = QVBoxLayout()
+        self.log_status_label = QLabel("Log backlog: ---")
+        self.log_status_label.setWordWrap(True)
+        logging_layout.addWidget(self.log_status_label)
+        logging_group.setLayout(logging_layout)
+
+        # ================== PERFORMANCE ==================
+        self.perf_group = CollapsibleGroupBox("Performance")
+        perf_layout = QVBoxLayout()
+        self.perf_label = QLabel("Collecting...")
+        self.perf_label.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.SystemFont.FixedFont))
+        self.perf_label.setTextInteractionFlags(QtCore.Qt.TextInteractionFlag.TextSelectableByMouse)
+        export_perf_button = QPushButton("Export...")
+        export_perf_button.clicked.connect(self.export_perf)
+        perf_layout.addWidget(self.perf_label)
+        perf_layout.addWidget(export_perf_button)
+        self.perf_group.setLayout(perf_layout)
+
+        # ================== HISTORY (SCROLL-BACK) ==================
+        history_group = QGroupBox("History")
+        history_layout = QVBoxLayout()
+        self.live_checkbox = QCheckBox("Live")
+        self.live_checkbox.setChecked(True)
+        self.live_checkbox.toggled.connect(self.set_live)
+        self.history_span_combo = QComboBox()
+        self.history_span_combo.addItems(list(HISTORY_SPANS))
+        self.history_span_combo.setCurrentText(self.history_span)
+        self.history_span_combo.currentTextChanged.connect(self.set_history_span)
+        self.history_slider = QSlider(QtCore.Qt.Orientation.Horizontal)
+        self.history_slider.setRange(0, 1000)
+        self.history_slider.setValue(1000)
+        self.history_slider.valueChanged.connect(self.scroll_history)
+        self.history_label = QLabel("Showing live data")
+        self.history_label.setWordWrap(True)
+        history_layout.addWidget(self.live_checkbox)
+        history_layout.addWidget(QLabel("Window:"))
+        history_layout.addWidget(self.history_span_combo)
+        history_layout.addWidget(self.history_slider)
+        history_layout.addWidget(self.history_label)
+        history_group.setLayout(history_layout)
+
         # ================== SERVO CONTROL ==================
         servo_button = QPushButton("Water Plants")
         servo_button.clicked.connect(self.send_servo_command)
@@ -290,6 +442,9 @@ class SerialPlotter(QtWidgets.QWidget):
         side_panel.addWidget(warning_group)
         side_panel.addWidget(warning_display_group)
         side_panel.addWidget(readout_group)
+        side_panel.addWidget(logging_group)
+        side_panel.addWidget(self.perf_group)
+        side_panel.addWidget(history_group)
         side_panel.addWidget(servo_group)
         side_panel.addStretch()
         
@@ -312,39 +467,23 @@ class SerialPlotter(QtWidgets.QWidget):
                 widget.setParent(None)
 
         # Re-add visible charts with dynamic stretch
-        visible_charts = [c['canvas'] for c in self.charts.values() if c['visible']]
+        visible_charts = [c['widget'] for c in self.charts.values() if c['visible']]
         count = len(visible_charts)
         if count == 0:
             return
 
-        for canvas in visible_charts:
-            self.chart_layout.addWidget(canvas, stretch=1)
+        for widget in visible_charts:
+            self.chart_layout.addWidget(widget, stretch=1)
 
     def create_chart(self, sensor_id, title, ylabel, color):
-        fig = Figure()
-        canvas = FigureCanvas(fig)
-        ax = fig.add_subplot(111)
-        
-        line, = ax.plot([], [], label=ylabel, color=color, linewidth=2.5)
-        min_warn_line = ax.axhline(y=0, color='blue', linestyle='--', linewidth=2, visible=False)
-        max_warn_line = ax.axhline(y=0, color='red', linestyle='--', linewidth=2, visible=False)
-        min_thresh_line = ax.axhline(y=0, color='black', linestyle='--', linewidth=2, visible=False)
-        
-        ax.set_ylabel(ylabel)
-        ax.set_xlabel("Time (s)")
-        ax.grid()
-        fig.suptitle(title)
-        fig.legend(loc="upper right")
-        
+        # Built the first time the chart is shown, not while the window is being set up
+        chart = create_chart_backend(self.chart_backend, title, ylabel, color, blit=self.blit, lazy=True,
+                                     on_ready=lambda: self.renderer.mark_dirty('charts'))
         self.charts[sensor_id] = {
-            'figure': fig,
-            'canvas': canvas,
-            'axis': ax,
-            'line': line,
-            'min_warn_line': min_warn_line,
-            'max_warn_line': max_warn_line,
-            'min_thresh_line': min_thresh_line,
-            'visible': True
+            'chart': chart,
+            'widget': chart.widget,
+            'visible': True,
+            'history_ylim': (0, 100),  # y range of the last history view
         }
     
     def toggle_chart_visibility(self):
@@ -352,7 +491,7 @@ class SerialPlotter(QtWidgets.QWidget):
             visible = cb.isChecked()
             chart = self.charts.get(sensor_id)
             if chart:
-                chart['canvas'].setVisible(visible)
+                chart['widget'].setVisible(visible)
                 chart['visible'] = visible
 
         self.resize_visible_charts()
@@ -368,7 +507,7 @@ class SerialPlotter(QtWidgets.QWidget):
         
         layout.addWidget(QLabel("Select Sensor:"))
         sensor_combo = QComboBox()
-        sensor_combo.addItems(list(self.data_buffers.keys()))
+        sensor_combo.addItems(self.store.channels)
         layout.addWidget(sensor_combo)
         
         layout.addWidget(QLabel("Chart Title:"))
@@ -398,6 +537,8 @@ class SerialPlotter(QtWidgets.QWidget):
             color = color_combo.currentText()
             
             self.create_chart(sensor_id, title, ylabel, color)
+            self.resize_visible_charts()
+            self.update_threshold_lines()
             
             if sensor_id not in self.chart_checkboxes:
                 cb = QCheckBox(f"Show {sensor_id} chart")
@@ -418,7 +559,7 @@ class SerialPlotter(QtWidgets.QWidget):
                 self.warning_thresholds[sensor_id] = {'min': None, 'max': None}
 
     def setup_timer(self):
-        # Run update loop every 20ms
+        # Drain the serial ring buffer every 20ms
         self.timer = QtCore.QTimer()
         self.timer.timeout.connect(self.update_data)
         self.timer.start(20)
@@ -430,6 +571,85 @@ class SerialPlotter(QtWidgets.QWidget):
 
     def update_clock(self):
         self.clock_label.setText(f"Time: {get_current_time_string()}")
+        self.update_log_status()
+        self.update_perf_panel()
+
+    def update_log_status(self):
+        error = getattr(self.serial, 'error', None)
+        if error is not None:
+            set_label_text(self.log_status_label, f"Not connected\n{self.serial.port}")
+            if not self.connect_error_shown:
+                self.connect_error_shown = True
+                QtWidgets.QMessageBox.critical(self, "Connection Failed", str(error))
+            return
+        if getattr(self.serial, 'connecting', False):
+            set_label_text(self.log_status_label, f"Connecting to {self.serial.port}...")
+            return
+        disconnected_at = getattr(self.serial, 'disconnected_at', None)
+        if disconnected_at is not None:
+            set_label_text(self.log_status_label, f"Connection lost {time.time() - disconnected_at:.0f} s ago\n"
+                                                  f"Reconnecting to {self.serial.port}...")
+            return
+        if self.log_writer is None:
+            set_label_text(self.log_status_label, f"Logged by the acquisition daemon\n{self.serial.port}")
+            return
+        stats = self.log_writer.stats()
+        text = (f"Log backlog: {stats['queue_depth']} rows\n"
+                f"Written: {stats['rows_written']} rows\n"
+                f"Write latency: {stats['last_latency_ms']:.0f} ms "
+                f"(flush {stats['last_flush_ms']:.1f} ms)")
+        for name, writer in (("Log", self.log_writer), ("History", self.history_writer)):
+            if writer is not None and (writer.error is not None or writer.dropped_rows):
+                text += f"\n{name}: {writer.dropped_rows} rows dropped"
+                if writer.error is not None:
+                    text += f"\n{name} write failed: {writer.error}"
+        if hasattr(self.serial, 'samples_per_second'):
+            text += f"\nReplay: {self.serial.samples_per_second:.0f} samples/s"
+        set_label_text(self.log_status_label, text)
+
+    def update_perf_panel(self):
+        # Called once a second: refresh rates and gauges, and the panel text if it is open
+        perf = self.perf
+        rates = perf.update_rates()
+        framer = getattr(self.serial, 'framer', None)
+        perf.set_gauge('serial_backlog_bytes', getattr(self.serial, 'in_waiting', 0))
+        perf.set_gauge('dropped_lines', getattr(self.serial, 'dropped_lines', 0))
+        perf.set_gauge('lost_frames', getattr(self.serial, 'lost_frames', 0))
+        perf.set_gauge('reconnects', getattr(self.serial, 'reconnects', 0))
+        perf.set_gauge('bad_frames', getattr(framer, 'bad_frames', 0))
+        perf.set_gauge('log_queue_depth', self.log_writer.queue_depth if self.log_writer else 0)
+        if not self.perf_group.isChecked():
+            return
+
+        gauges = perf.gauges
+        lines = [
+            f"Ingest:  {rates.get('samples_in', 0):7.0f} /s",
+            f"         {rates.get('bytes_in', 0) / 1024:7.1f} KiB/s",
+            f"Render:  {rates.get('frames', 0):7.1f} FPS",
+            f"Backlog: {gauges['serial_backlog_bytes']:7d} B",
+            f"Dropped: {gauges['dropped_lines']:7d}",
+            f"Bad line:{perf.counters.get('malformed', 0):7d}",
+            f"Lost fr: {gauges['lost_frames']:7d}",
+            f"Reconn:  {gauges['reconnects']:7d}",
+            f"Bad fr:  {gauges['bad_frames']:7d}",
+            "",
+            f"{'ms':<14}{'p50':>6}{'p99':>7}",
+        ]
+        # The reader and writer threads can add stages while this runs
+        for name, histogram in list(perf.stages.items()):
+            lines.append(f"{name[:14]:<14}{histogram.percentile(50) / 1e6:6.2f}{histogram.percentile(99) / 1e6:7.2f}")
+        set_label_text(self.perf_label, "\n".join(lines))
+
+    def export_perf(self):
+        filename, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Export performance data", generate_filename("perf", "json"), "JSON (*.json)")
+        if not filename:
+            return
+        try:
+            self.perf.export(filename)
+            print(f"[INFO] Performance data written to {filename}")
+        except OSError as e:
+            QtWidgets.QMessageBox.warning(self, "Export Failed", str(e))
 
     def toggle_theme(self):
         self.theme = "dark" if self.theme == "light" else "light"
@@ -445,15 +665,14 @@ class SerialPlotter(QtWidgets.QWidget):
             sensor = self.sender().property('sensor')
             
             min_val = float(self.threshold_controls[sensor]['min_input'].text())
-            # Save internal GUI-side thresholds
-            self.threshold_levels[sensor]['min'] = min_val
 
             # Format name for Arduino
             arduino_name = "moisture"
 
-            # Construct and send threshold command to Arduino
+            # Construct and send threshold command to Arduino (this also saves the GUI-side threshold)
             command = f"SET_THRESH {arduino_name} {min_val:.0f}"
-            self.serial.send_command(command)
+            self.acquisition.send_command(command)
+            self.update_threshold_lines()
             print(f"Sent to Arduino: {command}")
 
         except ValueError as e:
@@ -467,21 +686,14 @@ class SerialPlotter(QtWidgets.QWidget):
             min_warn = float(self.warning_controls[sensor]['min_input'].text())
             max_warn = float(self.warning_controls[sensor]['max_input'].text())
             validate_range(min_warn, max_warn, "warning level")
-            
-            # Save warning thresholds
-            self.warning_thresholds[sensor]['min'] = min_warn
-            self.warning_thresholds[sensor]['max'] = max_warn
-            
-            # Save warning thresholds
-            self.warning_thresholds[sensor]['min'] = min_warn
-            self.warning_thresholds[sensor]['max'] = max_warn
 
             # Format the sensor name for Arduino
             arduino_name = "temp_C" if sensor == "temp_C" else "moisture"
 
-            # Construct command string
+            # Construct command string; sending it also saves the warning thresholds
             command = f"SET_WARN {arduino_name} {min_warn:.2f} {max_warn:.2f}"
-            self.serial.send_command(command)
+            self.acquisition.send_command(command)
+            self.update_threshold_lines()
             print(f"Sent to Arduino: {command}")
 
         except ValueError as e:
@@ -489,172 +701,213 @@ class SerialPlotter(QtWidgets.QWidget):
 
     def send_servo_command(self):
         # Send servo angle command
-        self.serial.send_command("STEP_SERVO")
+        self.acquisition.send_command("STEP_SERVO")
 
     def update_data(self):
         try:
-            line = self.serial.read_line()
-            if not line:
-                return
-
-            # Handle servo acknowledgement
-            if line.startswith("ACK_SERVO:"):
-                print(f"[RX] {line}")
-                return
+            perf = self.perf
 
-            parsed = parse_sensor_line(line)
-            if not parsed:
+            # New batch averages (already logged) since the last tick
+            avg_time, avg_moist, avg_temp, _ = self.acquisition.poll()
+            if not len(avg_moist):
                 return
 
-            moist, temp = parsed
-            now = get_iso_timestamp()
-            
-            # update batch processing data
-            self.batch_buffers['moisture'].append(moist)
-            self.batch_buffers['temp_C'].append(temp)
-            
-            # check whether they reach batch size for processing
-            if len(self.batch_buffers['moisture']) >= self.batch_size:
-                # calculate average
-                avg_moist = sum(self.batch_buffers['moisture']) / self.batch_size
-                avg_temp = sum(self.batch_buffers['temp_C']) / self.batch_size
-
-                # Update min/max tracking
-                self.min_readings['moisture'] = min(self.min_readings['moisture'], avg_moist)
-                self.max_readings['moisture'] = max(self.max_readings['moisture'], avg_moist)
-                self.min_readings['temp_C'] = min(self.min_readings['temp_C'], avg_temp)
-                self.max_readings['temp_C'] = max(self.max_readings['temp_C'], avg_temp)
-
-                # Update UI
-                self.moisture_min_label.setText(f"Min Moisture: {self.min_readings['moisture']:.1f}")
-                self.moisture_max_label.setText(f"Max Moisture: {self.max_readings['moisture']:.1f}")
-                self.temp_min_label.setText(f"Min Temp: {self.min_readings['temp_C']:.1f} °C")
-                self.temp_max_label.setText(f"Max Temp: {self.max_readings['temp_C']:.1f} °C")
-
-                # clear batch_buffer
-                self.batch_buffers['moisture'].clear()
-                self.batch_buffers['temp_C'].clear()
-                
-                # update data buffer
-                self.data_buffers['moisture'].append(avg_moist)
-                self.data_buffers['temp_C'].append(avg_temp)
-                
-                elapsed = (datetime.now() - self.start_time).total_seconds()
-                self.timestamps.append(elapsed)
+            with perf.span('store'):
+                for avg_m, avg_t, t in zip(avg_moist.tolist(), avg_temp.tolist(), avg_time.tolist()):
+                    self.add_average(avg_m, avg_t, t)
 
-                # log to CSV
-                log_sensor_data(self.csv_writer, now, avg_moist, avg_temp, self.csv_file)
-                
-                # update label
-                update_labels(self.moisture_label, self.temp_label, avg_moist, avg_temp)
-                self.moisture_min_label.setText(f"Min Moisture: {self.min_readings['moisture']:.1f}")
-                self.moisture_max_label.setText(f"Max Moisture: {self.max_readings['moisture']:.1f}")
-                self.temp_min_label.setText(f"Min Temp: {self.min_readings['temp_C']:.1f} °C")
-                self.temp_max_label.setText(f"Max Temp: {self.max_readings['temp_C']:.1f} °C")
-
-                # update all visible chart
-                for sensor_id, chart in self.charts.items():
-                    if chart['visible']:
-                        data = self.data_buffers.get(sensor_id)
-                        if data:
-                            line = chart['line']
-                            ax = chart['axis']
-                            canvas = chart['canvas']
-                            
-                            line.set_data(self.timestamps, data)
-
-                            if len(self.timestamps) > 1:
-                                ax.set_xlim(self.timestamps[0], self.timestamps[-1])
-                            else:
-                                ax.set_xlim(0, 1)
-
-                            if sensor_id == 'moisture':
-                                ax.set_ylim(0, 100)
-                            else:
-                                ax.set_ylim(min(data) - 10, max(data) + 10)
-
-                            # Fix cropping by forcing layout adjustment
-                            chart['figure'].tight_layout()
-                            canvas.draw()
-                
-                # Check for warnings
+            # Check for warnings
+            with perf.span('check_warn'):
                 self.check_warnings()
 
+            # Repainting happens on the render timer, however many samples arrived
+            self.renderer.mark_dirty('labels')
+            if self.live:
+                self.renderer.mark_dirty('charts')
+
         except Exception as e:
-            print(f"[Error] {e}")
+            # Report each distinct error once rather than on every tick
+            if str(e) != self.last_update_error:
+                self.last_update_error = str(e)
+                print(f"[Error] {e}")
+
+    def add_average(self, avg_moist, avg_temp, now=None):
+        if now is None:
+            now = time.time()
+
+        # update data buffer
+        elapsed = now - self.start_epoch
+        self.store.append(elapsed, moisture=avg_moist, temp_C=avg_temp)
+
+        # Update min/max/mean tracking
+        self.stats['moisture'].add(elapsed, avg_moist)
+        self.stats['temp_C'].add(elapsed, avg_temp)
+        self.decimators['moisture'].append(elapsed, avg_moist)
+        self.decimators['temp_C'].append(elapsed, avg_temp)
+
+
+    def refresh_labels(self):
+        # Only pushes text that actually changed
+        update_labels(self.moisture_label, self.temp_label,
+                      self.store.latest('moisture'), self.store.latest('temp_C'))
+        moist = self.stats['moisture'].get(self.stats_window)
+        temp = self.stats['temp_C'].get(self.stats_window)
+        set_label_text(self.moisture_min_label, f"Min Moisture: {moist.min:.1f}")
+        set_label_text(self.moisture_max_label, f"Max Moisture: {moist.max:.1f}")
+        set_label_text(self.moisture_mean_label, f"Mean Moisture: {moist.mean:.1f} ± {moist.std:.1f}")
+        set_label_text(self.temp_min_label, f"Min Temp: {temp.min:.1f} °C")
+        set_label_text(self.temp_max_label, f"Max Temp: {temp.max:.1f} °C")
+        set_label_text(self.temp_mean_label, f"Mean Temp: {temp.mean:.1f} ± {temp.std:.1f} °C")
+
+    def set_stats_window(self, name):
+        self.stats_window = name
+        if len(self.store):
+            self.renderer.mark_dirty('labels')
+
+    def refresh_charts(self):
+        if not self.live:
+            self.refresh_history_charts()
+            return
 
-    def check_warnings(self):
-        active_warnings = []
-        warning_occurred = False
-        
-        # Check warning status for each sensor
-        for sensor in self.data_buffers.keys():
-            # Get current value and warning settings
-            current_value = self.data_buffers[sensor][-1] if self.data_buffers[sensor] else None
-            min_warn = self.warning_thresholds[sensor]['min']
-            max_warn = self.warning_thresholds[sensor]['max']
-            
-            # Show warning threshold lines on chart
-            chart = self.charts.get(sensor)
-            if chart:
-                if min_warn is not None:
-                    chart['min_warn_line'].set_ydata(min_warn)
-                    chart['min_warn_line'].set_visible(True)
-                else:
-                    chart['min_warn_line'].set_visible(False)
+        # update all visible chart
+        timestamps = self.store.timestamps()
+        for sensor_id, chart in self.charts.items():
+            if chart['visible'] and sensor_id in self.store.channels:
+                data = self.store.view(sensor_id)
+                if len(data):
+                    backend = chart['chart']
+
+                    # Spikes that trigger warnings survive min/max decimation
+                    decimator = self.decimators[sensor_id]
+                    decimator.set_target(backend.pixel_width(), timestamps, data)
+                    decimator.evict(timestamps[0])
+                    backend.set_data(*decimator.output())
+
+                    if len(timestamps) > 1 and timestamps[-1] > timestamps[0]:
+                        xlim = (timestamps[0], timestamps[-1])
+                    else:
+                        xlim = (0, 1)
+
+                    if sensor_id == 'moisture' or not self.stats[sensor_id].visible.count:
+                        ylim = (0, 100)
+                    else:
+                        # Autoscale from the streaming stats of the visible window, no rescan
+                        visible = self.stats[sensor_id].visible
+                        ylim = (visible.min - 10, visible.max + 10)
+
+                    backend.set_view(xlim, ylim)
+                    backend.render()
+
+    def set_live(self, live):
+        self.live = live
+        if live:
+            set_label_text(self.history_label, "Showing live data")
+            self.history_slider.blockSignals(True)
+            self.history_slider.setValue(self.history_slider.maximum())
+            self.history_slider.blockSignals(False)
+        self.renderer.mark_dirty('charts')
+
+    def set_history_span(self, name):
+        self.history_span = name
+        if not self.live:
+            self.renderer.mark_dirty('charts')
+
+    def scroll_history(self, value):
+        # Moving the slider leaves live mode
+        if self.live:
+            self.live_checkbox.setChecked(False)
+        else:
+            self.renderer.mark_dirty('charts')
 
-                if max_warn is not None:
-                    chart['max_warn_line'].set_ydata(max_warn)
-                    chart['max_warn_line'].set_visible(True)
+    def refresh_history_charts(self):
+        time_range = self.history.time_range()
+        if time_range is None:
+            set_label_text(self.history_label, "No history yet")
+            return
+
+        # The slider moves the window between the start and the end of the session
+        first, last = time_range
+        span = HISTORY_SPANS[self.history_span] or max(last - first, 1)
+        position = self.history_slider.value() / self.history_slider.maximum()
+        t0 = first + max(0, last - first - span) * position
+        t1 = t0 + span
+        for sensor_id, chart in self.charts.items():
+            if chart['visible'] and sensor_id in self.store.channels:
+                backend = chart['chart']
+                times, values = self.history.query(sensor_id, t0, t1, 2 * backend.pixel_width())
+                backend.set_data(times - self.start_epoch, values)
+
+                known = values[values == values]  # NaN rows mark connection gaps
+                if sensor_id == 'moisture':
+                    ylim = (0, 100)
+                elif len(known):
+                    ylim = (known.min() - 10, known.max() + 10)
                 else:
-                    chart['max_warn_line'].set_visible(False)
+                    ylim = chart['history_ylim']  # nothing but gaps: keep the last scale
+                chart['history_ylim'] = ylim
+                backend.set_view((t0 - self.start_epoch, t1 - self.start_epoch), ylim)
+                backend.render()
+
+        # Say whether the charts show raw samples or a rollup tier
+        source = self.history.last_source or 'raw'
+        set_label_text(self.history_label,
+                       f"{datetime.fromtimestamp(t0):%d %b %H:%M:%S} – {datetime.fromtimestamp(t1):%d %b %H:%M:%S}\n"
+                       f"Source: {'raw samples' if source == 'raw' else source + ' rollups'}")
+
+    def update_threshold_lines(self):
+        for sensor in self.store.channels:
+            chart = self.charts.get(sensor)
+            if not chart:
+                continue
 
-                min_thresh = self.threshold_levels.get(sensor, {}).get('min')
+            # Only repaint (and in scroll-back, requery the history) when a line actually moved
+            backend = chart['chart']
+            changed = backend.set_hline('min_warn', self.warning_thresholds[sensor]['min'])
+            changed |= backend.set_hline('max_warn', self.warning_thresholds[sensor]['max'])
+            changed |= backend.set_hline('min_thresh', self.threshold_levels.get(sensor, {}).get('min'))
+            if changed:
+                self.renderer.mark_dirty('charts')
 
-                if 'min_thresh_line' in chart:
-                    if min_thresh is not None:
-                        chart['min_thresh_line'].set_ydata(min_thresh)
-                        chart['min_thresh_line'].set_visible(True)
-                    else:
-                        chart['min_thresh_line'].set_visible(False)
+    def check_warnings(self):
+        # Show warning threshold lines on chart
+        self.update_threshold_lines()
+
+        # Check warning status for each sensor
+        active_warnings = self.acquisition.check_warnings()
+        warning_occurred = bool(active_warnings)
 
-                chart['canvas'].draw()
-            
-            # If warning values are set and we have current value
-            if min_warn is not None and max_warn is not None and current_value is not None:
-                # Check if below minimum warning
-                if current_value < min_warn:
-                    self.warnings[sensor]['active'] = True
-                    message = f"{sensor.capitalize()} is too low: {current_value:.1f} < {min_warn:.1f}"
-                    self.warnings[sensor]['message'] = message
-                    active_warnings.append(message)
-                    warning_occurred = True
-                # Check if above maximum warning
-                elif current_value > max_warn:
-                    self.warnings[sensor]['active'] = True
-                    message = f"{sensor.capitalize()} is too high:\n{current_value:.1f} > {max_warn:.1f}"
-                    self.warnings[sensor]['message'] = message
-                    active_warnings.append(message)
-                    warning_occurred = True
-                # Value is within normal range
-                else:
-                    self.warnings[sensor]['active'] = False
-                    self.warnings[sensor]['message'] = ''
-            else:
-                self.warnings[sensor]['active'] = False
-                self.warnings[sensor]['message'] = ''
-        
         # Play warning sound if any warning is active
         if warning_occurred and not self.warning_playing:
-            self.warning_sound.play()
+            self.load_warning_sound()
+            if self.warning_sound:
+                self.warning_sound.play()
             self.warning_playing = True
         elif not warning_occurred and self.warning_playing:
-            self.warning_sound.stop()
+            if self.warning_sound:
+                self.warning_sound.stop()
             self.warning_playing = False
         
-        # Update warning display
-        if active_warnings:
-            warning_text = "⚠️ WARNING! ⚠️\n" + "\n".join(active_warnings)
+        # Update warning display on the next frame, only if the messages changed
+        if active_warnings != self.active_warnings:
+            self.active_warnings = active_warnings
+            self.renderer.mark_dirty('warnings')
+
+    def load_warning_sound(self):
+        if self.warning_sound is not None:
+            return
+        try:
+            from PySide6 import QtMultimedia
+        except ImportError as e:
+            print(f"[WARNING] Warning sound unavailable: {e}")
+            self.warning_sound = False
+            return
+        self.warning_sound = QtMultimedia.QSoundEffect()
+        self.warning_sound.setSource(QtCore.QUrl.fromLocalFile("Python/Warning_Sound.wav"))
+        self.warning_sound.setVolume(0.5)
+
+    def refresh_warning_display(self):
+        if self.active_warnings:
+            warning_text = "⚠️ WARNING! ⚠️\n" + "\n".join(self.active_warnings)
             self.warning_display.setText(warning_text)
             self.warning_display.setAlignment(QtCore.Qt.AlignmentFlag.AlignCenter)
             self.warning_display.setStyleSheet("""
@@ -682,11 +935,82 @@ class SerialPlotter(QtWidgets.QWidget):
 
     def closeEvent(self, event):
         # Clean up on window close
+        self.timer.stop()
+        self.clock_timer.stop()
+        self.renderer.stop()
         try:
-            self.serial.close()
-            self.csv_file.close()
-            os.remove(self.filename)
-            print(f"[INFO] Deleted temporary log file: {self.filename}")
+            self.acquisition.close()
+            self.history.close_reader()
+            if self.filename:
+                os.remove(self.filename)
+                os.remove(self.history_file)
+                print(f"[INFO] Deleted temporary log file: {self.filename}")
         except Exception as e:
-            print(f"[WARNING] Failed to delete CSV: {e}")
-        event.accept()
\ No newline at end of file
+            print(f"[WARNING] Failed to delete log file: {e}")
+        event.accept()
+
+class MultiDevicePlotter(QtWidgets.QWidget):
+    # One SerialPlotter tab per device of a DeviceManager, on a shared time base, plus an
+    # overview tab with every device's latest readings, ingest rate and warnings.
+    overview_columns = ["Device", "Port", "Moisture", "Temp (°C)", "Samples/s", "Warnings"]
+
+    def __init__(self, manager, parent=None, **plotter_options):
+        super().__init__(parent)
+        self.setWindowTitle(f"Real-Time Sensor Plotter - {len(manager.device_ids)} devices")
+        self.resize(1200, 800)
+        self.manager = manager
+        manager.start_reader()
+
+        start_time = datetime.now()
+        self.tabs = QtWidgets.QTabWidget()
+        self.overview = QtWidgets.QTableWidget(len(manager.device_ids), len(self.overview_columns))
+        self.overview.setHorizontalHeaderLabels(self.overview_columns)
+        self.overview.horizontalHeader().setStretchLastSection(True)
+        self.overview.verticalHeader().setVisible(False)
+        self.overview.setEditTriggers(QtWidgets.QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.tabs.addTab(self.overview, "Overview")
+
+        self.plotters = {}
+        for device_id in manager.device_ids:
+            plotter = SerialPlotter(source=manager.source(device_id), device_id=device_id,
+                                    start_time=start_time, **plotter_options)
+            self.plotters[device_id] = plotter
+            self.tabs.addTab(plotter, device_id)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.tabs)
+
+        self.overview_timer = QtCore.QTimer(self)
+        self.overview_timer.timeout.connect(self.refresh_overview)
+        self.overview_timer.start(1000)
+
+    def refresh_overview(self):
+        if self.tabs.currentWidget() is not self.overview:
+            return
+        for row, (device_id, plotter) in enumerate(self.plotters.items()):
+            moist = plotter.store.latest('moisture')
+            temp = plotter.store.latest('temp_C')
+            warnings = [message.replace("\n", " ") for message in plotter.active_warnings]
+            if getattr(plotter.serial, 'disconnected_at', None) is not None:
+                warnings.insert(0, "Reconnecting")
+            cells = [
+                device_id,
+                plotter.serial.port,
+                "---" if moist is None or moist != moist else f"{moist:.1f}",
+                "---" if temp is None or temp != temp else f"{temp:.1f}",
+                f"{plotter.perf.rates.get('samples_in', 0):.0f}",
+                " | ".join(warnings),
+            ]
+            for column, text in enumerate(cells):
+                item = self.overview.item(row, column)
+                if item is None:
+                    self.overview.setItem(row, column, QtWidgets.QTableWidgetItem(text))
+                elif item.text() != text:
+                    item.setText(text)
+
+    def closeEvent(self, event):
+        self.overview_timer.stop()
+        for plotter in self.plotters.values():
+            plotter.close()
+        event.accept()
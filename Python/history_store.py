@@ -0,0 +1,151 @@
+import sqlite3
+import numpy as np
+from rollups import Rollups, ROLLUP_TIERS
+
+ROLLUP_DTYPE = np.dtype([
+    ('t', 'f8'),  # bucket start
+    ('min', 'f8'),
+    ('max', 'f8'),
+    ('mean', 'f8'),
+    ('count', 'i8'),
+])
+
+class HistoryStore:
+    # Whole-session history in SQLite, indexed by time, so the charts can scroll back past
+    # the in-memory window. It has the log sink interface (write_rows/flush/close) and is fed
+    # by its own AsyncLogWriter in parallel with the session log. The writer thread and the
+    # GUI use separate connections; WAL mode lets queries run while rows are being committed.
+    # Min/max/mean/count rollups (ROLLUP_TIERS) are kept up to date by the writer as well, so
+    # zoomed-out queries read pre-aggregated rows instead of rescanning raw samples.
+    channels = ('moisture', 'temp_C')
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._writer = None  # opened on first write, i.e. on the log writer thread
+        self._reader = None
+        self.rollups = Rollups()
+        self.last_source = None  # 'raw' or the rollup tier that answered the last query
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS samples (t REAL NOT NULL, moisture REAL, temp_C REAL)")
+        conn.execute("CREATE INDEX IF NOT EXISTS samples_t ON samples (t)")
+        conn.execute("CREATE TABLE IF NOT EXISTS rollups (tier TEXT NOT NULL, channel TEXT NOT NULL, t REAL NOT NULL, "
+                     "min_value REAL, max_value REAL, mean_value REAL, count INTEGER, "
+                     "PRIMARY KEY (tier, channel, t)) WITHOUT ROWID")
+        conn.commit()
+        conn.close()
+
+    def _connect(self, check_same_thread=True):
+        conn = sqlite3.connect(self.filename, check_same_thread=check_same_thread)
+        conn.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; only the last commit can be lost on power failure
+        return conn
+
+    # ---- sink interface (log writer thread) ----
+
+    def write_rows(self, rows):
+        # rows are (epoch_time, moisture, temp_C); NaN is stored as NULL, which rollups skip
+        if self._writer is None:
+            self._writer = self._connect()
+            if rows:
+                self._resume_rollups(rows[0][0])
+        self._writer.executemany("INSERT INTO samples (t, moisture, temp_C) VALUES (?, ?, ?)", rows)
+
+        closed = []
+        for t, moist, temp in rows:
+            closed.extend(self.rollups.add(t, {'moisture': moist, 'temp_C': temp}))
+        self._write_rollups(closed)
+
+    def _resume_rollups(self, t):
+        # A store reopened by a new session carries on with the buckets the last one left open
+        last_rows = {}
+        for tier in ROLLUP_TIERS:
+            for channel in self.channels:
+                row = self._writer.execute(
+                    "SELECT t, min_value, max_value, mean_value, count FROM rollups "
+                    "WHERE tier = ? AND channel = ? ORDER BY t DESC LIMIT 1", (tier, channel)).fetchone()
+                if row is not None:
+                    last_rows[(tier, channel)] = row
+        self.rollups.resume(t, last_rows)
+
+    def _write_rollups(self, rows):
+        self._writer.executemany("INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                 ((tier, channel, t, lo, hi, mean, count) for tier, t, channel, lo, hi, mean, count in rows))
+
+    def flush(self):
+        if self._writer is not None:
+            # Persist the partial buckets too, so every tier is current up to the last flush
+            self._write_rollups(self.rollups.open_rows())
+            self._writer.commit()
+
+    def close(self):
+        if self._writer is not None:
+            self.flush()
+            self._writer.close()
+            self._writer = None
+
+    # ---- queries (GUI thread) ----
+
+    def _query_conn(self):
+        if self._reader is None:
+            self._reader = self._connect(check_same_thread=False)
+        return self._reader
+
+    def time_range(self):
+        # (first, last) sample time, or None while the store is empty
+        first, last = self._query_conn().execute("SELECT MIN(t), MAX(t) FROM samples").fetchone()
+        return None if first is None else (first, last)
+
+    def query(self, channel, t0, t1, max_points=1000):
+        # Samples of `channel` between t0 and t1 as (times, values) arrays. Longer ranges are
+        # reduced to the min and max of max_points / 2 equal time buckets, so peaks survive and
+        # only about max_points rows ever leave the database. Buckets are built from the coarsest
+        # rollup tier that is still finer than a bucket, or from raw samples below 1 s.
+        if channel not in self.channels:
+            raise ValueError(f"Unknown channel '{channel}'")
+        conn = self._query_conn()
+        where = f"FROM samples WHERE t BETWEEN ? AND ? AND {channel} IS NOT NULL"
+
+        self.last_source = 'raw'
+        # Raw rows keep their NULLs, as NaN, so gaps (e.g. a lost connection) break the line
+        rows = conn.execute(f"SELECT t, {channel} FROM samples WHERE t BETWEEN ? AND ? ORDER BY t LIMIT ?",
+                            (t0, t1, max_points + 1)).fetchall()
+        width = (t1 - t0) / max(1, max_points // 2)
+        tiers = [(name, tier_width) for name, tier_width in ROLLUP_TIERS.items() if tier_width <= width]
+        if len(rows) > max_points and tiers:
+            tier, tier_width = tiers[-1]
+            self.last_source = tier
+            # Each bucket is drawn as a vertical min-max bar at its centre
+            buckets = conn.execute(
+                "SELECT CAST((t - ?) / ? AS INTEGER) AS b, MIN(min_value), MAX(max_value) FROM rollups "
+                "WHERE tier = ? AND channel = ? AND t > ? AND t <= ? GROUP BY b ORDER BY b",
+                (t0, width, tier, channel, t0 - tier_width, t1)).fetchall()
+            rows = [(t0 + (b + 0.5) * width, value) for b, lo, hi in buckets for value in (lo, hi)]
+        elif len(rows) > max_points:
+            bucket = f"CAST((t - ?) / ? AS INTEGER)"
+            # SQLite returns the row holding the MIN()/MAX() for the bare column t
+            lows = conn.execute(f"SELECT t, MIN({channel}) {where} GROUP BY {bucket}",
+                                (t0, t1, t0, width)).fetchall()
+            highs = conn.execute(f"SELECT t, MAX({channel}) {where} GROUP BY {bucket}",
+                                 (t0, t1, t0, width)).fetchall()
+            rows = sorted(set(lows) | set(highs))
+
+        if not rows:
+            return np.empty(0), np.empty(0)
+        data = np.array(rows, dtype=float)
+        return data[:, 0], data[:, 1]
+
+    def query_rollups(self, channel, tier, t0, t1):
+        # Pre-aggregated rows of one tier as a structured array (t, min, max, mean, count)
+        if tier not in ROLLUP_TIERS:
+            raise ValueError(f"Unknown rollup tier '{tier}'. Choose from: {', '.join(ROLLUP_TIERS)}")
+        rows = self._query_conn().execute(
+            "SELECT t, min_value, max_value, mean_value, count FROM rollups "
+            "WHERE tier = ? AND channel = ? AND t >= ? AND t <= ? ORDER BY t",
+            (tier, channel, t0, t1)).fetchall()
+        return np.array(rows, dtype=ROLLUP_DTYPE)
+
+    def close_reader(self):
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
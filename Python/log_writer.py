@@ -0,0 +1,157 @@
+import csv
+import queue
+import threading
+import time
+from datetime import datetime
+from binary_log import BinarySink
+
+class CsvSink:
+    # Writes (epoch_time, moisture, temp_C) rows as CSV with ISO timestamps
+    header = ["timestamp", "moisture", "temp_C"]
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, mode='w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(self.header)
+
+    def write_rows(self, rows):
+        self.writer.writerows(
+            (datetime.fromtimestamp(t).isoformat(timespec='seconds'), moist, temp)
+            for t, moist, temp in rows
+        )
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+# Log format name -> (sink class, file extension)
+LOG_FORMATS = {
+    'csv': (CsvSink, 'csv'),
+    'bin': (BinarySink, 'bin'),
+}
+
+def create_log_sink(log_format, filename):
+    try:
+        sink, _ = LOG_FORMATS[log_format]
+    except KeyError:
+        raise ValueError(f"Unknown log format '{log_format}'. Choose from: {', '.join(LOG_FORMATS)}")
+    return sink(filename)
+
+_STOP = object()
+
+class AsyncLogWriter:
+    # Moves log writes off the GUI thread. write() only enqueues; a writer thread batches
+    # rows and hands them to the sink once `flush_rows` are pending or `flush_interval`
+    # seconds have passed since the last flush, whichever comes first.
+    def __init__(self, sink, flush_rows=500, flush_interval=1.0):
+        self.sink = sink
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.queue = queue.SimpleQueue()
+
+        # Backlog monitoring
+        self.rows_written = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0  # time spent in write_rows() + flush()
+        self.max_flush_ms = 0.0
+        self.last_latency_ms = 0.0  # enqueue -> on disk, for the oldest row of the last batch
+        self.error = None  # why the last flush failed; cleared once one succeeds
+        self.dropped_rows = 0  # rows lost to failed flushes
+        self.perf = None  # optional PerfMonitor
+
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def write(self, row):
+        self.queue.put((time.perf_counter(), row))
+
+    @property
+    def queue_depth(self):
+        return self.queue.qsize()
+
+    def stats(self):
+        return {
+            'queue_depth': self.queue_depth,
+            'rows_written': self.rows_written,
+            'flushes': self.flushes,
+            'last_flush_ms': self.last_flush_ms,
+            'max_flush_ms': self.max_flush_ms,
+            'last_latency_ms': self.last_latency_ms,
+            'dropped_rows': self.dropped_rows,
+            'error': self.error,
+        }
+
+    def _run(self):
+        pending = []
+        oldest = None
+        last_flush = time.monotonic()
+        stopping = False
+
+        while not stopping:
+            timeout = max(0.0, last_flush + self.flush_interval - time.monotonic())
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            # Take whatever else is already queued without waiting
+            while item is not None:
+                if item is _STOP:
+                    stopping = True
+                    break
+                queued_at, row = item
+                if oldest is None:
+                    oldest = queued_at
+                pending.append(row)
+                if len(pending) >= self.flush_rows:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    item = None
+
+            now = time.monotonic()
+            if pending and (stopping or len(pending) >= self.flush_rows or now - last_flush >= self.flush_interval):
+                self._flush(pending, oldest)
+                pending = []
+                oldest = None
+            if not pending:
+                last_flush = now
+
+        try:
+            self.sink.close()
+        except Exception as e:
+            print(f"[ERROR] Failed to close log: {e}")
+
+    def _flush(self, rows, oldest):
+        start = time.perf_counter()
+        try:
+            self.sink.write_rows(rows)
+            self.sink.flush()
+        except Exception as e:
+            # Any sink can fail (OSError for files, sqlite3.Error for the history store): drop
+            # this batch and keep the thread alive, reporting each new error once
+            if str(e) != str(self.error):
+                print(f"[ERROR] Failed to write log: {e}")
+            self.error = e
+            self.dropped_rows += len(rows)
+            return
+        end = time.perf_counter()
+        self.error = None
+
+        self.rows_written += len(rows)
+        self.flushes += 1
+        self.last_flush_ms = (end - start) * 1000
+        self.max_flush_ms = max(self.max_flush_ms, self.last_flush_ms)
+        self.last_latency_ms = (end - oldest) * 1000
+        if self.perf:
+            self.perf.record('log_flush', int((end - start) * 1e9))
+
+    def close(self, timeout=10):
+        # Final flush of everything queued so far, then close the sink
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join(timeout)
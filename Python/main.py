@@ -1,16 +1,52 @@
 import sys
+import argparse
 from PySide6 import QtWidgets, QtCore
 from serial.tools import list_ports
-from gui import SerialPlotter
+from gui import SerialPlotter, MultiDevicePlotter
+from device_manager import DeviceManager, parse_port_list
+from replay import ReplaySource
+from daemon import DaemonClient, DEFAULT_ADDRESS
+from sample_bus import BusSource, DEFAULT_BUS_NAME
 
-def main():
-    app = QtWidgets.QApplication(sys.argv)
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Real-time sensor plotter")
+    parser.add_argument("--binary", action="store_true",
+                        help="ask the Arduino for binary sample frames instead of ASCII lines")
+    parser.add_argument("--backend", choices=["matplotlib", "pyqtgraph"], default="matplotlib",
+                        help="chart rendering backend")
+    parser.add_argument("--log-format", choices=["csv", "bin"], default="csv",
+                        help="session log format: CSV text or fixed-width binary records")
+    parser.add_argument("--log-dir",
+                        help="keep the session log in this directory as rotating, gzip-compressed segments")
+    parser.add_argument("--segment-minutes", type=float, default=60,
+                        help="start a new log segment after this many minutes (with --log-dir)")
+    parser.add_argument("--segment-mb", type=float, default=64,
+                        help="start a new log segment once the current one reaches this size (with --log-dir)")
+    parser.add_argument("--replay", metavar="LOG",
+                        help="replay a recorded log (file or --log-dir directory) instead of reading a COM port")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="replay speed as a multiple of real time; 0 replays as fast as possible")
+    parser.add_argument("--ports",
+                        help="read several Arduinos at once: comma-separated ports, optionally named "
+                             "(e.g. bed1=COM3,bed2=COM4); skips the COM port dialog")
+    parser.add_argument("--attach", nargs="?", const=DEFAULT_ADDRESS, metavar="ADDRESS",
+                        help="show a running acquisition daemon (daemon.py) instead of opening a port; "
+                             "closing the window leaves it running")
+    parser.add_argument("--bus", nargs="?", const=DEFAULT_BUS_NAME, metavar="NAME",
+                        help="plot the raw samples a daemon publishes on a shared-memory sample bus (daemon.py --bus)")
+    parser.add_argument("--async", dest="async_io", action="store_true",
+                        help="read the port(s) from one asyncio event loop shared with Qt (needs qasync) "
+                             "instead of a reader thread per port")
+    # Leave anything we don't recognise for Qt
+    args, _ = parser.parse_known_args(argv)
+    return args
 
+def choose_port():
     # Get list of available COM ports
     ports = list_ports.comports()
     if not ports:
         QtWidgets.QMessageBox.critical(None, "No COM Ports", "No COM ports found.")
-        return
+        return None
 
     # Select port
     port_descriptions = [p.description for p in ports]
@@ -25,10 +61,105 @@ def main():
         0,
         False
     )
+    return port_lookup[item] if ok and item else None
+
+def run_async(app, args, devices):
+    # Every port on Qt's own event loop via qasync: no reader threads, and all ports open
+    # concurrently, each ready as soon as its Arduino starts streaming
+    try:
+        import qasync
+    except ImportError:
+        QtWidgets.QMessageBox.critical(None, "Missing Package", "--async needs the qasync package (pip install qasync).")
+        return
+    import asyncio
+    from async_serial import AsyncSerialHandler
+
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    with loop:
+        try:
+            handlers = loop.run_until_complete(asyncio.gather(
+                *(AsyncSerialHandler.open(port, binary=args.binary) for port in devices.values())))
+        except RuntimeError as e:
+            QtWidgets.QMessageBox.critical(None, "Connection Failed", str(e))
+            return
+
+        options = dict(chart_backend=args.backend, log_format=args.log_format, log_dir=args.log_dir,
+                       segment_max_age=args.segment_minutes * 60,
+                       segment_max_bytes=int(args.segment_mb * 1024 * 1024))
+        if len(handlers) == 1:
+            window = SerialPlotter(source=handlers[0], **options)
+        else:
+            window = MultiDevicePlotter(DeviceManager(devices, handlers=handlers), **options)
+        window.show()
+
+        closed = asyncio.Event()
+        app.aboutToQuit.connect(closed.set)
+        loop.run_until_complete(closed.wait())
+
+def main():
+    args = parse_args(sys.argv[1:])
+    app = QtWidgets.QApplication(sys.argv)
+
+    if args.attach:
+        try:
+            source = DaemonClient(args.attach)
+        except RuntimeError as e:
+            QtWidgets.QMessageBox.critical(None, "Acquisition Daemon", str(e))
+            return
+        window = SerialPlotter(source=source, chart_backend=args.backend)
+        window.setWindowTitle(f"Real-Time Sensor Plotter - {source.port} (daemon)")
+        window.show()
+        sys.exit(app.exec())
+
+    if args.bus:
+        try:
+            source = BusSource(args.bus)
+        except (RuntimeError, ValueError) as e:
+            QtWidgets.QMessageBox.critical(None, "Sample Bus", str(e))
+            return
+        window = SerialPlotter(source=source, chart_backend=args.backend, log_format=args.log_format,
+                               log_dir=args.log_dir, segment_max_age=args.segment_minutes * 60,
+                               segment_max_bytes=int(args.segment_mb * 1024 * 1024))
+        window.setWindowTitle(f"Real-Time Sensor Plotter - {source.port}")
+        window.show()
+        sys.exit(app.exec())
+
+    if args.async_io:
+        devices = parse_port_list(args.ports) if args.ports else None
+        if devices is None:
+            port = choose_port()
+            if port is None:
+                return
+            devices = {port: port}
+        run_async(app, args, devices)
+        return
+
+    if args.ports:
+        manager = DeviceManager(parse_port_list(args.ports), binary=args.binary, background=True)
+        window = MultiDevicePlotter(manager, chart_backend=args.backend, log_format=args.log_format,
+                                    log_dir=args.log_dir, segment_max_age=args.segment_minutes * 60,
+                                    segment_max_bytes=int(args.segment_mb * 1024 * 1024))
+        window.show()
+        sys.exit(app.exec())
+
+    if args.replay:
+        # Logged values are already batch averages, so replay them one by one
+        source = ReplaySource(args.replay, speed=args.speed)
+        window = SerialPlotter(source=source, batch_size=1, chart_backend=args.backend,
+                               log_format=args.log_format, log_dir=args.log_dir,
+                               segment_max_age=args.segment_minutes * 60,
+                               segment_max_bytes=int(args.segment_mb * 1024 * 1024))
+        window.setWindowTitle(f"Replay: {args.replay}")
+        window.show()
+        sys.exit(app.exec())
 
-    if ok and item:
-        selected_port = port_lookup[item]
-        window = SerialPlotter(port=selected_port)
+    selected_port = choose_port()
+    if selected_port:
+        window = SerialPlotter(port=selected_port, binary=args.binary, chart_backend=args.backend,
+                               log_format=args.log_format, log_dir=args.log_dir,
+                               segment_max_age=args.segment_minutes * 60,
+                               segment_max_bytes=int(args.segment_mb * 1024 * 1024))
         window.show()
         sys.exit(app.exec())
     else:
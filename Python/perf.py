@@ -0,0 +1,134 @@
+import json
+import time
+from datetime import datetime
+
+class LatencyHistogram:
+    # Durations in nanoseconds, bucketed log-linearly: 8 buckets per power of two, so any
+    # percentile is within ~6% of the true value. Recording is O(1) and memory is fixed
+    # however long the session runs.
+    SUB_BITS = 3
+    SUB_BUCKETS = 1 << SUB_BITS
+
+    def __init__(self):
+        self.counts = [0] * 512
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    @classmethod
+    def _index(cls, ns):
+        if ns < 2 * cls.SUB_BUCKETS:
+            return max(ns, 0)
+        shift = ns.bit_length() - cls.SUB_BITS - 1
+        return (shift + 1) * cls.SUB_BUCKETS + ((ns >> shift) - cls.SUB_BUCKETS)
+
+    @classmethod
+    def _value(cls, index):
+        # Midpoint of a bucket
+        if index < 2 * cls.SUB_BUCKETS:
+            return index
+        shift = index // cls.SUB_BUCKETS - 1
+        low = (cls.SUB_BUCKETS + index % cls.SUB_BUCKETS) << shift
+        return low + (1 << shift) / 2
+
+    def record(self, ns):
+        self.counts[min(self._index(ns), len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def percentile(self, p):
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(self._value(index), self.max_ns)
+        return float(self.max_ns)
+
+    @property
+    def mean_ns(self):
+        return self.total_ns / self.count if self.count else 0.0
+
+class _Span:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter_ns() - self.start)
+        return False
+
+class PerfMonitor:
+    # Per-stage latency histograms plus event counters and gauges for the hot path.
+    # Use `with perf.span('parse'):` around a step; each stage should be timed from one thread.
+    def __init__(self):
+        self.stages = {}  # name -> LatencyHistogram, in first-use order
+        self.counters = {}
+        self.gauges = {}
+        self.rates = {}  # counters per second over the last update_rates() interval
+        self._last_counters = {}
+        self._last_rate_time = time.monotonic()
+        self.started = datetime.now()
+
+    def stage(self, name):
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = LatencyHistogram()
+        return histogram
+
+    def span(self, name):
+        return _Span(self.stage(name))
+
+    def record(self, name, ns):
+        self.stage(name).record(ns)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def set_gauge(self, name, value):
+        self.gauges[name] = value
+
+    def update_rates(self):
+        now = time.monotonic()
+        elapsed = now - self._last_rate_time
+        if elapsed <= 0:
+            return self.rates
+        # Other threads may add counters meanwhile, so work from one copy
+        counters = dict(self.counters)
+        self.rates = {name: (value - self._last_counters.get(name, 0)) / elapsed
+                      for name, value in counters.items()}
+        self._last_counters = counters
+        self._last_rate_time = now
+        return self.rates
+
+    def snapshot(self):
+        return {
+            'started': self.started.isoformat(timespec='seconds'),
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'stages': {
+                name: {
+                    'count': h.count,
+                    'mean_ms': h.mean_ns / 1e6,
+                    'p50_ms': h.percentile(50) / 1e6,
+                    'p99_ms': h.percentile(99) / 1e6,
+                    'max_ms': h.max_ns / 1e6,
+                }
+                for name, h in list(self.stages.items())
+            },
+            'counters': dict(self.counters),
+            'rates': dict(self.rates),
+            'gauges': dict(self.gauges),
+        }
+
+    def export(self, filename):
+        with open(filename, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
@@ -0,0 +1,111 @@
+import csv
+import gzip
+import os
+import time
+from datetime import datetime
+import numpy as np
+from binary_log import read_binary_log
+from segmented_log import find_segments, load_manifest
+
+def load_log(path):
+    # (times, moisture, temp_C) float arrays from a CSV or binary log, a .gz segment,
+    # or a segmented log directory (segments are read in manifest order)
+    if os.path.isdir(path):
+        if load_manifest(path) is None:
+            raise ValueError(f"{path} has no log manifest")
+        parts = [load_log(segment) for segment in find_segments(path)]
+        if not parts:
+            return np.empty(0), np.empty(0), np.empty(0)
+        return tuple(np.concatenate(column) for column in zip(*parts))
+
+    name = path[:-3] if path.endswith('.gz') else path
+    if name.endswith('.bin'):
+        records = read_binary_log(path)
+        return (records['t'].astype(float), records['moisture'].astype(float),
+                records['temp_C'].astype(float))
+    return _load_csv(path)
+
+def _load_csv(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    times, moist, temp = [], [], []
+    with opener(path, 'rt', newline='') as f:
+        for row in csv.reader(f):
+            try:
+                t = datetime.fromisoformat(row[0]).timestamp()
+                m, c = float(row[1]), float(row[2])
+            except (ValueError, IndexError):
+                continue  # header or damaged row
+            times.append(t)
+            moist.append(m)
+            temp.append(c)
+    return _spread_duplicates(np.array(times)), np.array(moist), np.array(temp)
+
+def _spread_duplicates(times):
+    # CSV timestamps have 1 s resolution; spread each run of equal stamps evenly over its second
+    if len(times) < 2:
+        return times
+    starts = np.flatnonzero(np.concatenate(([True], times[1:] != times[:-1])))
+    counts = np.diff(np.append(starts, len(times)))
+    offsets = np.arange(len(times)) - np.repeat(starts, counts)
+    return times + offsets / np.repeat(counts, counts)
+
+class ReplaySource:
+    # Plays a recorded log back through the same interface as SerialHandler, so warnings,
+    # thresholds, stats and charts run exactly as they would live. `speed` is a multiple of
+    # real time; None or 0 delivers `max_chunk` samples per read, as fast as the GUI drains them.
+    def __init__(self, path, speed=1.0, max_chunk=20000):
+        self.port = path
+        self.speed = speed or None
+        self.max_chunk = max_chunk
+        self.times, self.moist, self.temp = load_log(path)
+        if not len(self.times):
+            raise ValueError(f"{path} contains no samples")
+        self.start_time = float(self.times[0])  # recorded time of the first sample
+        self.position = 0
+        self.wall_start = None
+        self.wall_end = None
+        print(f"[INFO] Loaded {len(self.times)} samples for replay from {path}")
+
+    def start_reader(self):
+        self.wall_start = time.perf_counter()
+
+    def stop_reader(self):
+        pass
+
+    def read_timed_samples(self):
+        # (times, moist, temp, messages) for the samples that are due since the last call
+        if self.wall_start is None:
+            self.start_reader()
+        if self.speed is None:
+            end = min(self.position + self.max_chunk, len(self.times))
+        else:
+            replay_now = self.start_time + (time.perf_counter() - self.wall_start) * self.speed
+            end = int(np.searchsorted(self.times, replay_now, side='right'))
+
+        start, self.position = self.position, max(self.position, end)
+        if self.position == len(self.times) and self.wall_end is None:
+            self.wall_end = time.perf_counter()
+            print(f"[INFO] Replay finished: {self.position} samples at {self.samples_per_second:.0f} samples/s")
+        return self.times[start:self.position], self.moist[start:self.position], self.temp[start:self.position], []
+
+    def read_samples(self):
+        _, moist, temp, messages = self.read_timed_samples()
+        return moist, temp, messages
+
+    @property
+    def finished(self):
+        return self.position == len(self.times)
+
+    @property
+    def samples_per_second(self):
+        # Sustained delivery rate since the replay started
+        if self.wall_start is None:
+            return 0.0
+        elapsed = (self.wall_end or time.perf_counter()) - self.wall_start
+        return self.position / elapsed if elapsed > 0 else 0.0
+
+    def send_command(self, command):
+        print(f"[INFO] Replay: not sending '{command.strip()}'")
+
+    def close(self):
+        print(f"[INFO] Replayed {self.position}/{len(self.times)} samples ({self.samples_per_second:.0f} samples/s)")
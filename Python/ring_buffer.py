@@ -0,0 +1,48 @@
+class RingBuffer:
+    # Fixed-size single-producer/single-consumer queue.
+    # The reader thread only ever moves `head` and the GUI thread only ever moves `tail`,
+    # so the two sides never write the same counter and no lock is needed.
+    def __init__(self, capacity=4096):
+        if capacity <= 0:
+            raise ValueError("Ring buffer capacity must be positive")
+        self.capacity = capacity
+        self.slots = [None] * capacity  # preallocated, never resized
+        self.head = 0  # total items written
+        self.tail = 0  # total items read
+        self.dropped = 0
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def push(self, item):
+        # Producer side: drop the new item (and count it) if the consumer has fallen behind
+        head = self.head
+        if head - self.tail >= self.capacity:
+            self.dropped += 1
+            return False
+        self.slots[head % self.capacity] = item
+        self.head = head + 1  # publish only after the slot is filled
+        return True
+
+    def extend(self, items):
+        for item in items:
+            self.push(item)
+
+    def drain(self, max_items=None):
+        # Consumer side: take everything that is pending in one go
+        tail = self.tail
+        count = self.head - tail
+        if max_items is not None:
+            count = min(count, max_items)
+        if count <= 0:
+            return []
+
+        start = tail % self.capacity
+        end = start + count
+        if end <= self.capacity:
+            items = self.slots[start:end]
+        else:
+            items = self.slots[start:] + self.slots[:end - self.capacity]
+
+        self.tail = tail + count  # release the slots back to the producer
+        return items
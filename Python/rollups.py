@@ -0,0 +1,104 @@
+import math
+
+# Rollup resolutions in seconds, finest first. Each tier is built from the closed buckets
+# of the tier before it, so every sample costs O(1) however many tiers there are.
+ROLLUP_TIERS = {
+    '1s': 1,
+    '1min': 60,
+    '1h': 3600,
+}
+
+class RollupTier:
+    # Open [start, min, max, total, count] bucket per channel at one resolution
+    def __init__(self, name, width):
+        self.name = name
+        self.width = width
+        self.open = {}
+
+    def add(self, channel, start, lo, hi, total, count):
+        # Merge a sample or a finer bucket; returns the bucket it closes, if any
+        start = math.floor(start / self.width) * self.width
+        bucket = self.open.get(channel)
+        if bucket is None or start > bucket[0]:
+            self.open[channel] = [start, lo, hi, total, count]
+            return bucket
+
+        # Same bucket (or a late sample, which is folded into the open bucket)
+        if lo < bucket[1]:
+            bucket[1] = lo
+        if hi > bucket[2]:
+            bucket[2] = hi
+        bucket[3] += total
+        bucket[4] += count
+        return None
+
+class Rollups:
+    # Min/max/mean/count per channel at every tier in ROLLUP_TIERS, updated as samples arrive.
+    # Rows are (tier, bucket_start, channel, min, max, mean, count).
+    def __init__(self, tiers=ROLLUP_TIERS):
+        self.tiers = [RollupTier(name, width) for name, width in tiers.items()]
+
+    def add(self, t, values):
+        # values: {channel: value}; NaN values are skipped. Returns the buckets this sample closed.
+        closed = []
+        for channel, value in values.items():
+            if value != value:
+                continue
+            bucket = (t, value, value, value, 1)
+            for tier in self.tiers:
+                bucket = tier.add(channel, *bucket)
+                if bucket is None:
+                    break
+                closed.append(self._row(tier, channel, bucket))
+        return closed
+
+    def open_rows(self):
+        # Partial buckets still being filled, e.g. to keep persisted tiers current. The finer
+        # tiers' open buckets haven't been merged into the coarser tiers yet, so each row
+        # includes them: every persisted tier then covers every sample so far.
+        rows = []
+        for channel in {channel for tier in self.tiers for channel in tier.open}:
+            pending = []  # open buckets of the finer tiers
+            for tier in self.tiers:
+                own = tier.open.get(channel)
+                merged = {}
+                for start, lo, hi, total, count in ([own] if own else []) + pending:
+                    start = math.floor(start / tier.width) * tier.width
+                    bucket = merged.get(start)
+                    if bucket is None:
+                        merged[start] = [start, lo, hi, total, count]
+                    else:
+                        bucket[1] = min(bucket[1], lo)
+                        bucket[2] = max(bucket[2], hi)
+                        bucket[3] += total
+                        bucket[4] += count
+                rows.extend(self._row(tier, channel, bucket) for bucket in merged.values())
+                if own:
+                    pending.append(own)
+        return rows
+
+    def resume(self, t, last_rows):
+        # Reopen the buckets an earlier session persisted that a sample at `t` still falls in,
+        # so they are extended rather than replaced. last_rows: {(tier, channel): (start, min,
+        # max, mean, count)}, the latest row of each tier. A persisted row already includes the
+        # finer tiers' open buckets (see open_rows()), so those are taken out of it again.
+        for channel in {channel for _, channel in last_rows}:
+            finer = None  # (total, count) of the finer tier's reopened bucket
+            for tier in self.tiers:
+                row = last_rows.get((tier.name, channel))
+                start = math.floor(t / tier.width) * tier.width
+                if row is None or row[0] != start:
+                    finer = None
+                    continue
+                _, lo, hi, mean, count = row
+                total = mean * count
+                if finer is None:
+                    tier.open[channel] = [start, lo, hi, total, count]
+                else:
+                    tier.open[channel] = [start, lo, hi, total - finer[0], count - finer[1]]
+                finer = (total, count)
+
+    @staticmethod
+    def _row(tier, channel, bucket):
+        start, lo, hi, total, count = bucket
+        return (tier.name, start, channel, lo, hi, total / count if count else math.nan, count)
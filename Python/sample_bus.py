@@ -0,0 +1,183 @@
+import os
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from binary_log import RECORD_DTYPE
+
+DEFAULT_BUS_NAME = "sensor_bus"
+
+# Shared memory layout: a 64-byte header of uint64 fields, then `capacity` RECORD_DTYPE slots.
+# Record i (counting from the start of the session) lives in slot i % capacity.
+HEADER_BYTES = 64
+MAGIC = int.from_bytes(b"SBUS0001", 'little')
+_MAGIC, _RECORD_SIZE, _CAPACITY, _RESERVED, _HEAD, _CLOSED = range(6)
+
+_written = set()  # buses this process writes, and so has registered for cleanup
+
+def _attach(name):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        # Before 3.13 every attaching process registers the segment with its resource tracker,
+        # which unlinks it when that process exits; only the writer should do that
+        if os.name == 'posix' and name not in _written:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+def _views(shm):
+    header = np.ndarray((HEADER_BYTES // 8,), dtype=np.uint64, buffer=shm.buf)
+    capacity = (shm.size - HEADER_BYTES) // RECORD_DTYPE.itemsize
+    records = np.ndarray((capacity,), dtype=RECORD_DTYPE, buffer=shm.buf, offset=HEADER_BYTES)
+    return header, records
+
+class SampleBus:
+    # Writer side of a shared-memory ring of (t, moisture, temp_C) records. Samples are written
+    # once and any number of processes read them in place (SampleBusReader), each with its own
+    # cursor, so adding a consumer costs the writer nothing. The writer never waits: a reader
+    # that falls more than `capacity` records behind loses the oldest ones and is told so.
+    # Only one process may write; the writer owns the segment and unlinks it on close().
+    def __init__(self, name=DEFAULT_BUS_NAME, capacity=1 << 16):
+        if capacity <= 0:
+            raise ValueError("Sample bus capacity must be positive")
+        try:
+            self.shm = shared_memory.SharedMemory(
+                name=name, create=True, size=HEADER_BYTES + capacity * RECORD_DTYPE.itemsize)
+        except FileExistsError:
+            raise RuntimeError(f"Sample bus '{name}' already exists; is another writer running?")
+        self.name = name
+        _written.add(name)
+        self.capacity = capacity
+        self.header, self.records = _views(self.shm)
+        self.header[:] = 0
+        self.header[_RECORD_SIZE] = RECORD_DTYPE.itemsize
+        self.header[_CAPACITY] = capacity
+        self.header[_MAGIC] = MAGIC  # last, so readers never see a half-initialised header
+
+    @property
+    def head(self):
+        return int(self.header[_HEAD])
+
+    def write(self, times, moist, temp):
+        n = len(times)
+        if not n:
+            return
+        head = int(self.header[_HEAD])
+        if n > self.capacity:
+            # Only the newest `capacity` records can be kept anyway
+            head += n - self.capacity
+            times, moist, temp = times[-self.capacity:], moist[-self.capacity:], temp[-self.capacity:]
+            n = self.capacity
+
+        # Announce the slots about to be overwritten, fill them, then publish the new head.
+        # A reader that copied any of those slots meanwhile sees the reservation and discards them.
+        self.header[_RESERVED] = head + n
+        start = head % self.capacity
+        first = min(n, self.capacity - start)
+        for field, values in (('t', times), ('moisture', moist), ('temp_C', temp)):
+            column = self.records[field]
+            column[start:start + first] = values[:first]
+            column[:n - first] = values[first:]
+        self.header[_HEAD] = head + n
+
+    def close(self):
+        # Readers see the stream end, then the segment goes away once they detach
+        self.header[_CLOSED] = 1
+        del self.header, self.records
+        self.shm.close()
+        self.shm.unlink()
+        _written.discard(self.name)
+
+class SampleBusReader:
+    # One consumer of a SampleBus, in any process. read() returns the records written since the
+    # last call as a RECORD_DTYPE array; nothing is locked, and the writer is never slowed down.
+    # Records the writer overwrote before they were read are skipped and counted in `lost`.
+    def __init__(self, name=DEFAULT_BUS_NAME, from_start=False):
+        try:
+            self.shm = _attach(name)
+        except FileNotFoundError:
+            raise RuntimeError(f"No sample bus named '{name}'")
+        self.name = name
+        self.header, self.records = _views(self.shm)
+        if int(self.header[_MAGIC]) != MAGIC or int(self.header[_RECORD_SIZE]) != RECORD_DTYPE.itemsize:
+            self.close()
+            raise ValueError(f"Shared memory '{name}' is not a sample bus")
+        self.capacity = int(self.header[_CAPACITY])
+        head = int(self.header[_HEAD])
+        # Start with whatever is still in the ring, or only with new samples
+        self.cursor = max(0, head - self.capacity) if from_start else head
+        self.lost = 0
+
+    @property
+    def pending(self):
+        return int(self.header[_HEAD]) - self.cursor
+
+    @property
+    def closed(self):
+        # The writer has gone and everything it wrote has been read
+        return bool(self.header[_CLOSED]) and not self.pending
+
+    def read(self, max_records=None):
+        head = int(self.header[_HEAD])
+        oldest = head - self.capacity
+        if self.cursor < oldest:
+            # Lapped by the writer since the last read
+            self.lost += oldest - self.cursor
+            self.cursor = oldest
+        n = head - self.cursor
+        if max_records is not None:
+            n = min(n, max_records)
+        if n <= 0:
+            return np.empty(0, dtype=RECORD_DTYPE)
+
+        start = self.cursor % self.capacity
+        first = min(n, self.capacity - start)
+        out = np.empty(n, dtype=RECORD_DTYPE)
+        out[:first] = self.records[start:start + first]
+        out[first:] = self.records[:n - first]
+
+        # Drop anything the writer started overwriting while we were copying
+        overwritten = int(self.header[_RESERVED]) - self.capacity - self.cursor
+        if overwritten > 0:
+            overwritten = min(overwritten, n)
+            self.lost += overwritten
+            out = out[overwritten:]
+        self.cursor += n
+        return out
+
+    def close(self):
+        del self.header, self.records
+        self.shm.close()
+
+class BusSource:
+    # A SampleBus as a sample source for SerialPlotter, with the SerialHandler interface.
+    # Commands can't go back over the bus; `dropped_lines` counts records lost to overflow.
+    def __init__(self, name=DEFAULT_BUS_NAME):
+        self.reader = SampleBusReader(name)
+        self.port = f"bus:{name}"
+        self.perf = None  # optional PerfMonitor
+        print(f"[INFO] Reading sample bus '{name}' ({self.reader.capacity} records)")
+
+    def start_reader(self):
+        pass
+
+    def read_timed_samples(self):
+        records = self.reader.read()
+        if self.perf:
+            self.perf.count('bytes_in', records.nbytes)
+        return (records['t'].astype(np.float64), records['moisture'].astype(np.float64),
+                records['temp_C'].astype(np.float64), [])
+
+    def read_samples(self):
+        _, moist, temp, messages = self.read_timed_samples()
+        return moist, temp, messages
+
+    @property
+    def dropped_lines(self):
+        return self.reader.lost
+
+    def send_command(self, command):
+        print(f"[INFO] Sample bus is read-only: not sending '{command.strip()}'")
+
+    def close(self):
+        self.reader.close()
+        print(f"[INFO] Detached from sample bus '{self.reader.name}' ({self.reader.lost} records lost)")
@@ -0,0 +1,199 @@
+import csv
+import gzip
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+from binary_log import read_binary_log, RECORD_DTYPE
+from log_writer import LOG_FORMATS
+
+MANIFEST_NAME = "manifest.json"
+
+class SegmentedSink:
+    # Log sink for long runs: rolls to a new segment file once the current one reaches
+    # `max_bytes` or spans `max_age` seconds. Closed segments are optionally gzip-compressed
+    # on a background thread, and manifest.json records every segment's time range so
+    # later queries only open the segments they need.
+    def __init__(self, directory, log_format='csv', prefix="sensor_log",
+                 max_bytes=64 * 1024 * 1024, max_age=3600, compress=True):
+        self.directory = directory
+        self.log_format = log_format
+        self.sink_class, self.ext = LOG_FORMATS[log_format]
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.compress = compress
+
+        os.makedirs(directory, exist_ok=True)
+        self.manifest_path = os.path.join(directory, MANIFEST_NAME)
+        self.manifest = load_manifest(directory) or {'format': log_format, 'segments': []}
+        if self.manifest['format'] != log_format:
+            raise ValueError(f"{directory} already holds '{self.manifest['format']}' logs")
+
+        self.lock = threading.Lock()  # manifest is also updated by the compressor thread
+        self.compressor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="log-compress")
+        self.sink = None
+        self.segment = None
+        self._recover()
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+        first_t = rows[0][0]
+        if self.sink is not None and (
+            self.sink.file.tell() >= self.max_bytes or first_t - self.segment['t_start'] >= self.max_age
+        ):
+            self._roll()
+        if self.sink is None:
+            self._open_segment(first_t)
+
+        self.sink.write_rows(rows)
+        with self.lock:
+            self.segment['t_end'] = max(self.segment['t_end'], max(row[0] for row in rows))
+            self.segment['rows'] += len(rows)
+
+    def flush(self):
+        if self.sink is not None:
+            self.sink.flush()
+        self._save_manifest()
+
+    def close(self):
+        if self.sink is not None:
+            self._roll()
+        self.compressor.shutdown(wait=True)
+        self._save_manifest()
+
+    def _open_segment(self, t):
+        stamp = datetime.fromtimestamp(t).strftime('%Y%m%d_%H%M%S')
+        name = f"{self.prefix}_{stamp}.{self.ext}"
+        suffix = 1
+        while os.path.exists(os.path.join(self.directory, name)) or os.path.exists(os.path.join(self.directory, name + ".gz")):
+            name = f"{self.prefix}_{stamp}_{suffix}.{self.ext}"
+            suffix += 1
+
+        self.sink = self.sink_class(os.path.join(self.directory, name))
+        self.segment = {'file': name, 't_start': t, 't_end': t, 'rows': 0, 'closed': False, 'compressed': False}
+        with self.lock:
+            self.manifest['segments'].append(self.segment)
+        self._save_manifest()
+
+    def _roll(self):
+        self.sink.close()
+        segment = self.segment
+        self.sink = None
+        self.segment = None
+        with self.lock:
+            segment['closed'] = True
+        self._save_manifest()
+        if self.compress:
+            self.compressor.submit(self._compress, segment)
+
+    def _compress(self, segment):
+        path = os.path.join(self.directory, segment['file'])
+        try:
+            with open(path, 'rb') as src, gzip.open(path + ".gz", 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+        except OSError as e:
+            print(f"[WARNING] Failed to compress log segment {path}: {e}")
+            return
+        # Point the manifest at the .gz before the original goes, so a reader never finds it missing
+        with self.lock:
+            segment['file'] += ".gz"
+            segment['compressed'] = True
+        self._save_manifest()
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"[WARNING] Failed to remove compressed log segment {path}: {e}")
+
+    def _recover(self):
+        # Segments a crashed session left open: take their end time and row count from the
+        # file itself, mark them closed and compress them as if they had rolled normally
+        leftovers = []
+        for segment in self.manifest['segments']:
+            path = os.path.join(self.directory, segment['file'])
+            if segment['compressed']:
+                # Crashed between the manifest update and removing the original
+                if os.path.exists(path[:-len(".gz")]):
+                    os.remove(path[:-len(".gz")])
+                continue
+            if segment.get('closed', False):
+                continue
+            if not os.path.exists(path):
+                print(f"[WARNING] Log segment {path} is missing")
+                continue
+            t_end, rows = _scan_segment(path, self.log_format)
+            if t_end is not None:
+                segment['t_end'] = max(segment['t_end'], t_end)
+            segment['rows'] = rows
+            segment['closed'] = True
+            leftovers.append(segment)
+
+        if leftovers:
+            print(f"[INFO] Recovered {len(leftovers)} log segment(s) left open in {self.directory}")
+            self._save_manifest()
+            if self.compress:
+                for segment in leftovers:
+                    self.compressor.submit(self._compress, segment)
+
+    def _save_manifest(self):
+        # Write to a temporary file and swap it in, so a crash never leaves a half-written manifest
+        tmp_path = self.manifest_path + ".tmp"
+        with self.lock:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.manifest, f, indent=2)
+            os.replace(tmp_path, self.manifest_path)
+
+def _scan_segment(path, log_format):
+    # (last timestamp, row count) of a segment, from its contents
+    if log_format == 'bin':
+        records = read_binary_log(path)
+        return (float(records['t'].max()) if len(records) else None), len(records)
+
+    t_end = None
+    rows = 0
+    with open(path, newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header
+        for row in reader:
+            try:
+                t = datetime.fromisoformat(row[0]).timestamp()
+            except (IndexError, ValueError):
+                continue  # a row cut short by the crash
+            rows += 1
+            t_end = t if t_end is None else max(t_end, t)
+    return t_end, rows
+
+def load_manifest(directory):
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+def find_segments(directory, t0=None, t1=None):
+    # Paths of the segments whose time range overlaps [t0, t1], oldest first
+    manifest = load_manifest(directory)
+    if manifest is None:
+        return []
+    return [
+        os.path.join(directory, segment['file'])
+        for segment in manifest['segments']
+        if (t0 is None or segment['t_end'] >= t0) and (t1 is None or segment['t_start'] <= t1)
+    ]
+
+def read_segments(directory, t0=None, t1=None):
+    # Binary-format logs only: records between t0 and t1 from just the overlapping segments
+    parts = [read_binary_log(path) for path in find_segments(directory, t0, t1)]
+    if not parts:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    records = np.concatenate(parts)
+    mask = np.ones(len(records), dtype=bool)
+    if t0 is not None:
+        mask &= records['t'] >= t0
+    if t1 is not None:
+        mask &= records['t'] <= t1
+    return records[mask]
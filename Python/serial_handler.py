@@ -1,19 +1,155 @@
 import serial
+import threading
 import time
+import numpy as np
+from serial.tools import list_ports
+from framing import LineFramer, BinaryFramer, decode_frames, count_lost_frames
+from ring_buffer import RingBuffer
+from utils import parse_sensor_line, parse_sensor_lines
+
+RECONNECT_BACKOFF = (0.1, 2.0)  # first and longest wait between attempts to reopen a lost port, s
+
+def port_identity(port):
+    # (vid, pid, serial_number) of a USB serial port, or None if it isn't one (pty, built-in UART)
+    for info in list_ports.comports():
+        if info.device == port and info.vid is not None:
+            return info.vid, info.pid, info.serial_number
+    return None
+
+def find_port(identity, default):
+    # Where a USB device is now: after a replug it can come back under another name
+    # (COM7 instead of COM6, /dev/ttyACM1 instead of ACM0)
+    if identity is None:
+        return default
+    matches = [info.device for info in list_ports.comports()
+               if (info.vid, info.pid, info.serial_number) == identity]
+    if default in matches or not matches:
+        return default
+    return matches[0]
+
+def _is_gap(item):
+    # A lost connection is marked in the reader's buffers by its number (an int) among the
+    # text lines and frame chunks
+    return isinstance(item, int)
+
+def _split_gaps(items, gap):
+    # ({gap number: items received after it}, last gap number) for items drained from a buffer
+    # whose last gap marker so far was `gap`. The markers themselves are dropped.
+    runs = {gap: []}
+    for item in items:
+        if _is_gap(item):
+            gap = item
+            runs[gap] = []
+        else:
+            runs[gap].append(item)
+    return runs, gap
 
 class SerialHandler:
-    def __init__(self, port='COM6', baud=9600, timeout=1):
+    def __init__(self, port='COM6', baud=9600, timeout=1, buffer_size=4096, binary=False, ready_timeout=5.0,
+                 background=False):
+        # ready_timeout: how long to wait for the Arduino's first sample after opening (0: don't wait).
+        # background=True returns at once and connects on a thread; `connecting` and `error` tell how it went.
         self.port = port
         self.baud = baud
         self.timeout = timeout
         self.ser = None
+        self.framer = LineFramer()
+
+        # Binary framing state
+        self.binary = False
+        self.last_seq = None  # only touched by read_samples()
+        self.lost_frames = 0
+        self.mode_switches = 0  # framer switches made by the reading thread
+        self.mode_switches_read = 0  # ...that read_samples() has restarted sequence counting for
+
+        # Background reader state
+        self.buffer = RingBuffer(buffer_size)  # text lines
+        self.frames = RingBuffer(buffer_size)  # chunks of binary frames
+        self.reader_thread = None
+        self.reader_lock = threading.Lock()  # start_reader() can race between the GUI and connect threads
+        self.stop_event = threading.Event()
+        self.perf = None  # optional PerfMonitor
+
+        # Connection state
+        self.ready_timeout = ready_timeout
+        self.ready = threading.Event()  # set by the first valid sample: the Arduino is up
+        self.error = None  # why a background connect failed
+        self.closed = False
+        self.connect_thread = None
+
+        # Reconnect state: the reader thread reopens a lost port by itself
+        self.identity = None  # USB VID/PID/serial number, to find the device again
+        self.disconnected_at = None  # time the port was lost, while it is down
+        self.reconnects = 0
+        self.last_outage_s = None  # port lost -> first sample after reopening, for the last reconnect
+        self.gaps_marked = 0  # number of the last gap marked in the buffers
+        self.gaps_read = 0  # number of the last gap returned as a NaN sample
+        self.lines_gap = 0  # last marker drained from each buffer
+        self.frames_gap = 0
+        self.resume_binary = False
+
+        if background:
+            self.connect_thread = threading.Thread(
+                target=self._connect_in_background, args=(binary,), name=f"serial-connect-{port}", daemon=True
+            )
+            self.connect_thread.start()
+        else:
+            self.connect(binary)
 
+    def connect(self, binary=False):
         try:
-            self.ser = serial.Serial(port=self.port, baudrate=self.baud, timeout=self.timeout)
-            time.sleep(3)  # Wait for Arduino to reset
-            print(f"[INFO] Serial connection established on {self.port} at {self.baud} baud.")
+            ser = serial.Serial(port=self.port, baudrate=self.baud, timeout=self.timeout)
         except serial.SerialException as e:
             raise RuntimeError(f"Failed to connect to {self.port}: {e}")
+        if self.closed:
+            ser.close()  # closed while the port was opening
+            return
+        self.ser = ser
+        self.identity = port_identity(self.port)
+
+        # Opening the port resets the Arduino. Rather than sleeping through the reset, read
+        # straight away and wait for its first valid sample.
+        if self.ready_timeout:
+            self.start_reader()
+            if not self.ready.wait(self.ready_timeout):
+                print(f"[WARNING] No data from {self.port} within {self.ready_timeout:g} s")
+        print(f"[INFO] Serial connection established on {self.port} at {self.baud} baud.")
+
+        if binary:
+            self.set_binary_mode(True)
+
+    def _connect_in_background(self, binary):
+        try:
+            self.connect(binary)
+        except RuntimeError as e:
+            self.error = e
+            print(f"[ERROR] {e}")
+
+    @property
+    def connecting(self):
+        return self.connect_thread is not None and self.connect_thread.is_alive()
+
+    def set_binary_mode(self, enabled):
+        # Switch the firmware between binary frames and the "moist,temp" ASCII fallback.
+        # The framer is swapped by whichever thread feeds it, before its next bytes (see _feed_framer()),
+        # and the binary framer still passes text lines through, so ASCII data is accepted either way.
+        self.binary = enabled
+        self.send_command("SET_MODE BINARY" if enabled else "SET_MODE ASCII")
+
+    def _feed_framer(self, data):
+        # Returns (frames, lines). Called only from the thread reading the port.
+        framer = self.framer
+        binary = isinstance(framer, BinaryFramer)
+        if binary != self.binary:
+            # Mode switched since the last read: carry the half-received text line over
+            partial = framer.text.buffer if binary else framer.buffer
+            framer = self.framer = BinaryFramer() if self.binary else LineFramer()
+            (framer.text if self.binary else framer).buffer += partial
+            self.mode_switches += 1
+            binary = self.binary
+        if binary:
+            return framer.feed(data)
+        return b"", framer.feed(data)
 
     def read_line(self):
         # Read a line from the serial port and decode it to string
@@ -21,15 +157,204 @@ class SerialHandler:
             return self.ser.readline().decode('utf-8').strip()
         return
 
+    def read_chunk(self):
+        # One read() for everything already waiting; otherwise block up to `timeout` for the next byte
+        return self.ser.read(self.ser.in_waiting or 1)
+
+    def read_lines(self):
+        # Pull everything in in_waiting with a single read() and return the complete lines.
+        # Don't mix with start_reader(): both paths share the same framer.
+        if not (self.ser and self.ser.in_waiting):
+            return []
+        return self._feed_framer(self.ser.read(self.ser.in_waiting))[1]
+
+    def start_reader(self):
+        # Start draining the port continuously on a background thread
+        with self.reader_lock:
+            if self.reader_thread is not None or self.closed:
+                return
+            self.stop_event.clear()
+            self.reader_thread = threading.Thread(
+                target=self._reader_loop, name=f"serial-reader-{self.port}", daemon=True
+            )
+            self.reader_thread.start()
+
+    def stop_reader(self):
+        with self.reader_lock:
+            if self.reader_thread is None:
+                return
+            self.stop_event.set()
+            self.reader_thread.join(timeout=self.timeout + 1)
+            self.reader_thread = None
+
+    def _reader_loop(self):
+        while not self.stop_event.is_set():
+            if self.ser is None:
+                if self.error is not None:
+                    break
+                # Still connecting in the background
+                self.stop_event.wait(0.01)
+                continue
+            try:
+                data = self.read_chunk()
+            except (serial.SerialException, OSError, TypeError) as e:
+                if self.stop_event.is_set():
+                    break  # closed under the read
+                print(f"[ERROR] Serial read failed on {self.port}: {e}")
+                self._reconnect()
+                continue
+            if not data:
+                continue
+            if self.perf:
+                self.perf.count('bytes_in', len(data))
+                with self.perf.span('framing'):
+                    self._ingest(data)
+            else:
+                self._ingest(data)
+
+    def _reconnect(self):
+        # The device went away (cable pulled, USB reset): mark the gap, then keep trying to
+        # reopen it, backing off exponentially, until it is back or the handler is closed
+        self.disconnected_at = time.time()
+        self.gaps_marked += 1  # counted before either marker is pushed, see read_samples()
+        self.buffer.push(self.gaps_marked)
+        self.frames.push(self.gaps_marked)
+        try:
+            self.ser.close()
+        except (serial.SerialException, OSError):
+            pass
+
+        delay, max_delay = RECONNECT_BACKOFF
+        attempts = 0
+        while not self.stop_event.wait(delay):
+            attempts += 1
+            port = find_port(self.identity, self.port)
+            try:
+                ser = serial.Serial(port=port, baudrate=self.baud, timeout=self.timeout)
+            except (serial.SerialException, OSError):
+                delay = min(delay * 2, max_delay)
+                continue
+            print(f"[INFO] Reopened {port} after {time.time() - self.disconnected_at:.1f} s ({attempts} attempts)")
+            self.port = port
+            self.ser = ser
+            # Start clean: no half line from before the gap, and the Arduino has reset into ASCII mode
+            self.framer = BinaryFramer() if self.binary else LineFramer()
+            self.resume_binary = self.binary
+            self.ready.clear()
+            return
+
+    def _resumed(self):
+        # First valid sample after a reconnect: the link is back
+        self.last_outage_s = time.time() - self.disconnected_at
+        print(f"[INFO] Connection to {self.port} restored after {self.last_outage_s:.1f} s")
+        self.disconnected_at = None
+        self.reconnects += 1
+        if self.resume_binary:
+            self.resume_binary = False
+            self.send_command("SET_MODE BINARY")
+
+    def _ingest(self, data):
+        frames, lines = self._feed_framer(data)
+        if frames:
+            self.frames.push(frames)
+        self.buffer.extend(lines)
+        if not self.ready.is_set() and (frames or any(parse_sensor_line(line) for line in lines)):
+            self.ready.set()
+            if self.disconnected_at is not None:
+                self._resumed()
+
+    def read_pending(self):
+        # Return every line received since the last call (non-blocking)
+        return [line for line in self.buffer.drain() if not _is_gap(line)]
+
+    def read_samples(self):
+        # Return (moist, temp, messages) for everything received since the last call.
+        # Samples from ASCII lines and binary frames are merged; other text lines come back as messages.
+        # A lost connection shows up as a NaN sample between the samples from before and after it.
+        lines = self.buffer.drain()
+        chunks = self.frames.drain()
+        # A marker is only pushed after gaps_marked has counted it, so if both buffers have
+        # already given up the latest one, there is none among what was just drained
+        if self.lines_gap == self.frames_gap == self.gaps_marked:
+            return self._decode(lines, chunks)
+
+        # The reader may have marked a gap in one buffer but not yet the other, and a full
+        # buffer can drop a marker; numbering them keeps both sides of each gap together and
+        # reports it once, whichever buffer it turns up in
+        line_runs, self.lines_gap = _split_gaps(lines, self.lines_gap)
+        frames_gap = self.frames_gap
+        chunk_runs, self.frames_gap = _split_gaps(chunks, self.frames_gap)
+        parts = []
+        messages = []
+        for gap in sorted(line_runs.keys() | chunk_runs.keys()):
+            if gap > self.gaps_read:
+                self.gaps_read = gap
+                parts.append((np.array([np.nan]), np.array([np.nan])))
+            if gap > frames_gap:
+                self.last_seq = None  # frames after a reconnect start a new sequence
+            moist, temp, run_messages = self._decode(line_runs.get(gap, []), chunk_runs.get(gap, []))
+            parts.append((moist, temp))
+            messages.extend(run_messages)
+        moist, temp = (np.concatenate(column) for column in zip(*parts))
+        return moist, temp, messages
+
+    def _decode(self, lines, chunks):
+        # Stray gap markers are skipped, never decoded
+        if int in map(type, lines):
+            lines = [line for line in lines if not _is_gap(line)]
+        if int in map(type, chunks):
+            chunks = [chunk for chunk in chunks if not _is_gap(chunk)]
+        moist, temp, rejected = parse_sensor_lines(lines)
+        messages = [lines[i] for i in np.flatnonzero(rejected)]
+        if chunks:
+            seq, frame_moist, frame_temp = decode_frames(b"".join(chunks))
+            self._track_sequence(seq)
+            moist = np.concatenate((moist, frame_moist))
+            temp = np.concatenate((temp, frame_temp))
+        return moist, temp, messages
+
+    def read_timed_samples(self):
+        # read_samples() plus a receive time for each sample (the time of this call)
+        moist, temp, messages = self.read_samples()
+        return np.full(len(moist), time.time()), moist, temp, messages
+
+    def _track_sequence(self, seq):
+        # Count frames lost in transit from gaps in the 8-bit sequence number
+        if self.mode_switches_read != self.mode_switches:
+            self.mode_switches_read = self.mode_switches
+            self.last_seq = None
+        lost, self.last_seq = count_lost_frames(self.last_seq, seq)
+        self.lost_frames += lost
+
+    @property
+    def dropped_lines(self):
+        return self.buffer.dropped
+
+    @property
+    def in_waiting(self):
+        # Bytes the OS has received that the reader thread hasn't picked up yet
+        try:
+            return self.ser.in_waiting if self.ser and self.ser.is_open else 0
+        except (serial.SerialException, OSError):
+            return 0
+
     def send_command(self, command):
         # Send a string command to the serial device
         if self.ser:
             full_cmd = command.strip() + "\n"
-            self.ser.write(full_cmd.encode('utf-8'))
+            try:
+                self.ser.write(full_cmd.encode('utf-8'))
+            except (serial.SerialException, OSError) as e:
+                print(f"[ERROR] Failed to send '{command.strip()}' to {self.port}: {e}")
+                return
             print(f"[TX] {full_cmd.strip()}")
+        else:
+            print(f"[WARNING] Not connected to {self.port}: '{command.strip()}' not sent")
 
     def close(self):
         # Safely close the serial port
+        self.closed = True
+        self.stop_reader()
         if self.ser and self.ser.is_open:
             self.ser.close()
             print(f"[INFO] Closed serial connection on {self.port}")
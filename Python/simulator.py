@@ -0,0 +1,301 @@
+import argparse
+import math
+import os
+import random
+import select
+import threading
+import time
+import tty
+from framing import encode_frame
+
+# Lines a flaky cable or a half-flashed board produces; all must be survivable by the parser
+MALFORMED_LINES = [
+    b"\n",
+    b"garbage\n",
+    b"42,\n",
+    b",21.50\n",
+    b"42,abc\n",
+    b"42;21.50\n",
+    b"42,21.50,7\n",
+    b"\xff\xfe\x00\n",
+    b"4",  # truncated: runs into the next line
+]
+
+# Binary-mode faults: a frame with a broken CRC, line noise (a stray sync byte and junk, then a
+# newline) before a frame, or a frame lost in transit (its sequence number is skipped)
+FRAME_FAULTS = ('crc', 'garbage', 'skip')
+FRAME_NOISE = b"\xa5\x00\x00\x00\x00\x00\xff\r\n"
+
+class ArduinoSimulator:
+    # Stand-in for Arduino/main/main.ino on a Linux pseudo-terminal. Streams "moist,temp" lines
+    # (or binary frames after SET_MODE BINARY) at `rate` samples/s and answers STEP_SERVO,
+    # SET_THRESH, SET_WARN and SET_MODE with the firmware's reply strings. Watering pauses the
+    # stream for `watering_time` seconds, as the firmware's delay() does.
+    # Stress options: gaussian `noise` on both channels, `malformed` probability per line,
+    # `frame_faults` probability per binary frame, and a burst of `burst_size` extra samples
+    # every `burst_every` seconds.
+    # unplug() and replug() pull and reconnect the cable; give a `link` path (like the stable
+    # names under /dev/serial/by-id/) so the host can find the new pty after a replug.
+    def __init__(self, rate=20, noise=0.5, malformed=0.0, burst_every=0, burst_size=0,
+                 watering_time=2.0, cooldown=10.0, seed=None, max_backlog=65536, link=None, frame_faults=0.0):
+        self.rate = rate
+        self.noise = noise
+        self.malformed = malformed
+        self.frame_faults = frame_faults
+        self.burst_every = burst_every
+        self.burst_size = burst_size
+        self.watering_time = watering_time
+        self.cooldown = cooldown
+        self.max_backlog = max_backlog  # bytes the "UART" holds before the device blocks
+        self.random = random.Random(seed)
+        self.link = link
+        self.reset_firmware()
+
+        # Counters
+        self.samples_sent = 0
+        self.malformed_sent = 0
+        self.faults_sent = dict.fromkeys(FRAME_FAULTS, 0)
+        self.stalls = 0
+        self.commands = []
+        self.replugs = 0
+
+        self.thread = None
+        self.stop_event = threading.Event()
+        self.open_pty()
+
+    def reset_firmware(self):
+        # Power-on state; the host opening the port resets the board into it
+        self.binary_mode = False
+        self.frame_seq = 0
+        self.moist_thresh_min = -1
+        self.temp_warn = (-999.0, 999.0)
+        self.moist_warn = (-1, 1024)
+        self.last_watering = -math.inf
+        self.paused_until = 0.0
+        self.moisture_offset = 0.0  # raised by watering, then dries out
+
+    def open_pty(self):
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self.slave)
+        if self.link:
+            if os.path.lexists(self.link):
+                os.remove(self.link)
+            os.symlink(self.port, self.link)
+            self.port = self.link
+        self.outgoing = bytearray()
+        self.incoming = bytearray()
+        self.plugged = True
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name="arduino-sim", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join(timeout=2)
+            self.thread = None
+
+    def close(self):
+        self.stop()
+        self.close_pty()
+
+    def close_pty(self):
+        if not self.plugged:
+            return
+        self.plugged = False
+        os.close(self.master)
+        os.close(self.slave)
+        if self.link and os.path.lexists(self.link):
+            os.remove(self.link)
+
+    def unplug(self):
+        # The cable is pulled: the host's reads fail and the port disappears
+        self.stop()
+        self.close_pty()
+
+    def replug(self):
+        # Plugged back in: a new pty (under `link`) and a board fresh out of reset
+        self.reset_firmware()
+        self.open_pty()
+        self.replugs += 1
+        return self.start()
+
+    # ---- sensor model ----
+
+    def read_sensors(self, t):
+        # Slowly drying soil with a daily-ish temperature swing, plus noise
+        moisture = 55 + 20 * math.sin(t / 60) + self.moisture_offset + self.random.gauss(0, self.noise)
+        temp = 21.5 + 1.5 * math.sin(t / 300) + self.random.gauss(0, self.noise / 5)
+        self.moisture_offset *= 0.999
+        return int(min(100, max(0, moisture))), temp
+
+    def encode_sample(self, moisture, temp):
+        if self.binary_mode:
+            frame = encode_frame(self.frame_seq, moisture, temp)
+            self.frame_seq = (self.frame_seq + 1) & 0xFF
+            if not (self.frame_faults and self.random.random() < self.frame_faults):
+                return frame
+            fault = self.random.choice(FRAME_FAULTS)
+            self.faults_sent[fault] += 1
+            if fault == 'crc':
+                return frame[:-1] + bytes([frame[-1] ^ 0xFF])
+            if fault == 'garbage':
+                return FRAME_NOISE + frame
+            return b""
+        if self.malformed and self.random.random() < self.malformed:
+            self.malformed_sent += 1
+            return self.random.choice(MALFORMED_LINES)
+        return f"{moisture},{temp:.2f}\r\n".encode()
+
+    # ---- main loop ----
+
+    def _run(self):
+        start = time.monotonic()
+        produced = 0
+        next_burst = start + self.burst_every if self.burst_every else math.inf
+
+        while not self.stop_event.is_set():
+            now = time.monotonic()
+            self._handle_input(now)
+
+            if now >= self.paused_until:
+                due = int((now - start) * self.rate) - produced
+                if now >= next_burst:
+                    due += self.burst_size
+                    next_burst += self.burst_every
+                if due > 0 and len(self.outgoing) >= self.max_backlog:
+                    # Host isn't reading: like Serial.print, block instead of losing data
+                    self.stalls += 1
+                    start += due / self.rate
+                    due = 0
+                for _ in range(due):
+                    moisture, temp = self.read_sensors(now - start)
+                    self.outgoing += self.encode_sample(moisture, temp)
+                    produced += 1
+                    self.samples_sent += 1
+                    if moisture < self.moist_thresh_min:
+                        self.water(now)
+                    if self.paused_until:
+                        break
+            else:
+                # The firmware produces nothing while the servo delay() runs
+                start = now - produced / self.rate
+
+            self._flush()
+            self._wait(start, produced)
+
+    def _wait(self, start, produced):
+        # Sleep until the next sample is due or the host writes something
+        if self.outgoing:
+            select.select([self.master], [self.master], [], 0.001)
+            return
+        delay = max(0.0, start + (produced + 1) / self.rate - time.monotonic())
+        select.select([self.master], [], [], min(delay, 0.05))
+
+    def _flush(self):
+        if not self.outgoing:
+            return
+        try:
+            written = os.write(self.master, self.outgoing)
+        except BlockingIOError:
+            return
+        del self.outgoing[:written]
+
+    def _handle_input(self, now):
+        try:
+            self.incoming += os.read(self.master, 4096)
+        except (BlockingIOError, OSError):
+            pass
+        while b"\n" in self.incoming:
+            line, _, rest = self.incoming.partition(b"\n")
+            self.incoming = bytearray(rest)
+            self.handle_command(line.decode('utf-8', 'replace').strip(), now)
+
+        if self.paused_until and now >= self.paused_until:
+            self.paused_until = 0.0
+            self.reply("Closed")
+
+    # ---- firmware commands ----
+
+    def reply(self, text):
+        self.outgoing += (text + "\r\n").encode()
+
+    def handle_command(self, command, now):
+        self.commands.append(command)
+        if command == "STEP_SERVO":
+            self.water(now)
+        elif command.startswith("SET_THRESH "):
+            parts = command[11:].split(' ', 1)
+            if len(parts) == 2 and parts[0] == "moisture":
+                value = min(100.0, max(0.0, _to_float(parts[1])))
+                self.moist_thresh_min = int(value)
+                self.reply(f"Received moisture threshold min: {value:.2f}")
+        elif command.startswith("SET_WARN "):
+            parts = command[9:].split(' ')
+            if len(parts) < 3:
+                return
+            low, high = _to_float(parts[1]), _to_float(parts[2])
+            if parts[0] == "temp_C":
+                self.temp_warn = (low, high)
+                self.reply("Temp warning limits updated")
+            elif parts[0] == "moisture":
+                self.moist_warn = (int(min(100, max(0, low))), int(min(100, max(0, high))))
+                self.reply("Moisture warning limits updated")
+        elif command.startswith("SET_MODE "):
+            mode = command[9:]
+            if mode == "BINARY":
+                self.binary_mode = True
+                self.frame_seq = 0
+                self.reply("Mode: binary")
+            elif mode == "ASCII":
+                self.binary_mode = False
+                self.reply("Mode: ascii")
+
+    def water(self, now):
+        if now - self.last_watering < self.cooldown:
+            return  # Too soon, skip watering
+        self.last_watering = now
+        self.reply("Open")
+        self.moisture_offset += 30
+        self.paused_until = now + self.watering_time
+
+def _to_float(text):
+    # Arduino's String.toFloat(): 0 for anything unparsable
+    try:
+        return float(text)
+    except ValueError:
+        return 0.0
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated Arduino on a pseudo-terminal")
+    parser.add_argument("--rate", type=float, default=20, help="samples per second")
+    parser.add_argument("--noise", type=float, default=0.5, help="standard deviation of moisture noise")
+    parser.add_argument("--malformed", type=float, default=0.0, help="probability that a line is malformed")
+    parser.add_argument("--frame-faults", type=float, default=0.0,
+                        help="probability that a binary frame is corrupted, preceded by noise or lost")
+    parser.add_argument("--burst-every", type=float, default=0, help="seconds between bursts (0 = none)")
+    parser.add_argument("--burst-size", type=int, default=0, help="extra samples per burst")
+    parser.add_argument("--seed", type=int, help="random seed for a repeatable stream")
+    args = parser.parse_args()
+
+    sim = ArduinoSimulator(rate=args.rate, noise=args.noise, malformed=args.malformed,
+                           burst_every=args.burst_every, burst_size=args.burst_size, seed=args.seed,
+                           frame_faults=args.frame_faults)
+    sim.start()
+    print(f"[INFO] Simulated Arduino on {sim.port} at {args.rate:g} samples/s (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(5)
+            print(f"[INFO] Sent {sim.samples_sent} samples, {sim.malformed_sent} malformed, {sim.stalls} stalls")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sim.close()
+
+if __name__ == "__main__":
+    main()
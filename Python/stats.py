@@ -0,0 +1,140 @@
+import math
+from collections import deque
+
+class SessionStats:
+    # All-time min/max/mean/variance (Welford's algorithm, O(1) per sample)
+    def __init__(self):
+        self.count = 0
+        self.mean = math.nan
+        self._m2 = 0.0
+        self.min = math.nan
+        self.max = math.nan
+
+    def add(self, t, value):
+        if self.count == 0:
+            self.count = 1
+            self.mean = self.min = self.max = value
+            self._m2 = 0.0
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def variance(self):
+        return self._m2 / self.count if self.count else math.nan
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.count else math.nan
+
+class SlidingWindowStats:
+    # Min/max/mean/variance over the most recent samples, without rescanning them.
+    # The window is the last `span` seconds and/or the last `max_count` samples.
+    # Min and max come from monotonic deques (amortised O(1) per sample); mean and
+    # variance from running sums that are updated as samples enter and leave.
+    def __init__(self, span=None, max_count=None):
+        if span is None and max_count is None:
+            raise ValueError("A sliding window needs a span or a max_count")
+        self.span = span
+        self.max_count = max_count
+        self.samples = deque()  # (seq, t, value)
+        self.min_queue = deque()  # increasing values
+        self.max_queue = deque()  # decreasing values
+        self.total = 0.0
+        self.total_sq = 0.0
+        self.seq = 0
+
+    def add(self, t, value):
+        entry = (self.seq, t, value)
+        self.seq += 1
+        self.samples.append(entry)
+        self.total += value
+        self.total_sq += value * value
+
+        while self.min_queue and self.min_queue[-1][2] >= value:
+            self.min_queue.pop()
+        self.min_queue.append(entry)
+        while self.max_queue and self.max_queue[-1][2] <= value:
+            self.max_queue.pop()
+        self.max_queue.append(entry)
+
+        self._evict(t)
+
+    def _evict(self, now):
+        samples = self.samples
+        while samples and (
+            (self.span is not None and samples[0][1] <= now - self.span)
+            or (self.max_count is not None and len(samples) > self.max_count)
+        ):
+            seq, _, value = samples.popleft()
+            self.total -= value
+            self.total_sq -= value * value
+            if self.min_queue[0][0] == seq:
+                self.min_queue.popleft()
+            if self.max_queue[0][0] == seq:
+                self.max_queue.popleft()
+
+        if not samples:
+            # Reset the running sums so rounding error can't accumulate across idle periods
+            self.total = self.total_sq = 0.0
+
+    @property
+    def count(self):
+        return len(self.samples)
+
+    @property
+    def min(self):
+        return self.min_queue[0][2] if self.min_queue else math.nan
+
+    @property
+    def max(self):
+        return self.max_queue[0][2] if self.max_queue else math.nan
+
+    @property
+    def mean(self):
+        return self.total / len(self.samples) if self.samples else math.nan
+
+    @property
+    def variance(self):
+        n = len(self.samples)
+        if not n:
+            return math.nan
+        mean = self.total / n
+        return max(0.0, self.total_sq / n - mean * mean)
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance) if self.samples else math.nan
+
+# Rolling windows kept for every channel, in seconds
+STATS_WINDOWS = {
+    '1 min': 60,
+    '10 min': 600,
+    '1 h': 3600,
+}
+
+class ChannelStats:
+    # Whole-session stats, the rolling windows above, and a 'visible' window matching
+    # the number of samples the chart shows (used for autoscaling)
+    def __init__(self, visible_count):
+        self.session = SessionStats()
+        self.windows = {name: SlidingWindowStats(span=span) for name, span in STATS_WINDOWS.items()}
+        self.visible = SlidingWindowStats(max_count=visible_count)
+
+    def add(self, t, value):
+        if value != value:  # NaN (missing sample)
+            return
+        self.session.add(t, value)
+        for window in self.windows.values():
+            window.add(t, value)
+        self.visible.add(t, value)
+
+    def get(self, name):
+        # 'Session' or one of STATS_WINDOWS
+        return self.session if name == 'Session' else self.windows[name]
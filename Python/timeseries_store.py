@@ -0,0 +1,67 @@
+import numpy as np
+
+class TimeSeriesStore:
+    # Preallocated circular store: one contiguous array per channel plus a shared timestamp column.
+    # Every sample is written twice, at i and i + capacity, so the newest `len(store)` samples
+    # are always a single slice of the doubled array. Views never copy, appends are O(1),
+    # and memory is fixed up front however long the session runs.
+    def __init__(self, channels, capacity, dtype=np.float64):
+        if capacity <= 0:
+            raise ValueError("Store capacity must be positive")
+        self.capacity = capacity
+        self.channels = list(channels)
+        self.times = np.zeros(2 * capacity, dtype=np.float64)
+        self.values = {channel: np.full(2 * capacity, np.nan, dtype=dtype) for channel in self.channels}
+        self.head = 0  # next write position in [0, capacity)
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, t, **values):
+        # Channels missing from `values` are stored as NaN
+        head = self.head
+        mirror = head + self.capacity
+        self.times[head] = self.times[mirror] = t
+        for channel, column in self.values.items():
+            column[head] = column[mirror] = values.get(channel, np.nan)
+        self.head = (head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def extend(self, times, **columns):
+        # Vectorised append of a block of samples
+        times = np.asarray(times, dtype=np.float64)
+        n = len(times)
+        if n == 0:
+            return
+        keep = slice(max(0, n - self.capacity), n)  # only the newest `capacity` samples survive
+        pos = (self.head + np.arange(n)[keep]) % self.capacity
+        for target, source in [(self.times, times)] + [
+            (column, columns.get(channel, np.nan)) for channel, column in self.values.items()
+        ]:
+            source = np.broadcast_to(source, (n,))[keep]
+            target[pos] = source
+            target[pos + self.capacity] = source
+        self.head = (self.head + n) % self.capacity
+        self.count = min(self.count + n, self.capacity)
+
+    def _window(self):
+        end = self.head + self.capacity
+        return slice(end - self.count, end)
+
+    def timestamps(self):
+        # Zero-copy view of the stored timestamps, oldest first
+        return self.times[self._window()]
+
+    def view(self, channel):
+        # Zero-copy view of one channel, aligned with timestamps()
+        return self.values[channel][self._window()]
+
+    def latest(self, channel):
+        if not self.count:
+            return None
+        return float(self.values[channel][self.head + self.capacity - 1])
+
+    def clear(self):
+        self.head = 0
+        self.count = 0
@@ -1,4 +1,7 @@
+import re
+import warnings
 from datetime import datetime
+import numpy as np
 
 def append_and_average(temp_batch, moist_batch, new_temp, new_moist, batch_size=10):
     temp_batch.append(new_temp)
@@ -23,6 +26,69 @@ def parse_sensor_line(line):
     except ValueError:
         return None
 
+# A moisture field with anything besides digits, signs and spaces ("12.0", "1e2"), searched
+# for in "\n"-prefixed lines
+_NON_INTEGER_FIELD = re.compile(r"\n[\d \t+-]*[^\d\s,+-]")
+
+def _parse_pairs(lines):
+    # Parse "moist,temp" lines from one joined buffer; returns an (n, 2) array, or None if
+    # any line doesn't hold exactly two numbers
+    text = ",".join(lines)
+    if text.count(",") != 2 * len(lines) - 1:
+        return None
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            values = np.fromstring(text, dtype=np.float64, sep=",")
+    except ValueError:
+        return None
+    if values.size != 2 * len(lines):
+        return None
+    return values.reshape(-1, 2)
+
+def parse_sensor_lines(lines):
+    # Batch version of parse_sensor_line.
+    # Returns (moist, temp, rejected): moisture/temperature arrays for the accepted lines
+    # and a boolean mask over `lines` marking the ones that aren't a "moist,temp" pair.
+    n = len(lines)
+    rejected = np.ones(n, dtype=bool)
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0), rejected
+
+    # Fast path: the whole block is sensor data
+    index = np.arange(n)
+    pairs = _parse_pairs(lines)
+    if pairs is None:
+        # Skip status lines ("Open", "Temp warning limits updated", ...) and retry
+        index = np.array([i for i, line in enumerate(lines) if line.count(",") == 1], dtype=np.intp)
+        pairs = _parse_pairs([lines[i] for i in index]) if len(index) else np.empty((0, 2))
+
+    # np.fromstring also reads "12.0" or "1e2" as moisture, which int() refuses; leave blocks
+    # with any such line to the slow path so both parsers agree
+    if pairs is not None:
+        text = "\n".join(lines) if len(index) == n else "\n".join(lines[i] for i in index)
+        if _NON_INTEGER_FIELD.search("\n" + text) is None:
+            rejected[index] = False
+            return pairs[:, 0].astype(np.int64), pairs[:, 1], rejected
+
+    # Slow path: a malformed line slipped through, fall back to line-by-line
+    moist, temp = [], []
+    for i in index:
+        parsed = parse_sensor_line(lines[i])
+        if parsed:
+            moist.append(parsed[0])
+            temp.append(parsed[1])
+            rejected[i] = False
+    return np.array(moist, dtype=np.int64), np.array(temp, dtype=np.float64), rejected
+
+def average_batches(pending, values, batch_size=10):
+    # Vectorised append-and-average: returns the mean of every completed batch
+    # and the leftover samples to carry into the next call
+    data = np.concatenate((pending, values)) if len(pending) else np.asarray(values, dtype=np.float64)
+    full = len(data) // batch_size * batch_size
+    means = data[:full].reshape(-1, batch_size).mean(axis=1)
+    return means, data[full:]
+
 def get_iso_timestamp():
     return datetime.now().isoformat(timespec='seconds')
 
@@ -64,6 +130,33 @@ def update_plot(ax1, ax2, canvas, line1, line2, timestamps, moist_vals, temp_val
 
     canvas.draw()
 
+def fit_limits(current, lo, hi, pad, headroom=0):
+    # Keep the current axis limits while [lo, hi] still fits inside them, otherwise re-fit with
+    # `pad` on both sides plus `headroom` above. Limits more than twice as wide as needed are
+    # re-fitted too, so the view can shrink again.
+    if current is not None:
+        cur_lo, cur_hi = current
+        needed = (hi - lo) + 2 * pad + headroom
+        if cur_lo <= lo - pad and hi <= cur_hi and (cur_hi - cur_lo) <= 2 * needed:
+            return current
+    return (lo - pad, hi + pad + headroom)
+
+def set_hline(line, value):
+    # Show a horizontal threshold line at `value` (or hide it for None); returns True if it changed
+    visible = value is not None
+    if line.get_visible() == visible and (not visible or line.get_ydata()[0] == value):
+        return False
+    if visible:
+        line.set_ydata([value, value])
+    line.set_visible(visible)
+    return True
+
+def set_label_text(label, text):
+    # setText() triggers a relayout and repaint, so skip it when nothing changed
+    if label.text() != text:
+        label.setText(text)
+
 def update_labels(moisture_label, temp_label, moist, temp):
-    moisture_label.setText(f"Moisture: {moist:.0f}")
-    temp_label.setText(f"Temperature: {temp:.1f} °C")
+    # NaN: no reading (the connection was lost)
+    set_label_text(moisture_label, f"Moisture: {moist:.0f}" if moist == moist else "Moisture: ---")
+    set_label_text(temp_label, f"Temperature: {temp:.1f} °C" if temp == temp else "Temperature: ---")